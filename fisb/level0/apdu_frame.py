@@ -33,7 +33,16 @@ from fisb.level0.apdu_twgo import apdu_twgo
 from fisb.level0.apdu_global_block import apdu_global_block
 
 # Bit array lookup
-bitLookup = [0x80, 0x40, 0x20, 0x10, 0x08, 0x04, 0x02, 0x01]
+bitLookup = (0x80, 0x40, 0x20, 0x10, 0x08, 0x04, 0x02, 0x01)
+
+# Product ids of TWGO products.
+TWGO_PRODUCT_IDS = frozenset((8, 11, 12, 13, 14, 15, 16, 17))
+
+# Product ids of global block products.
+BLOCK_PRODUCT_IDS = frozenset((63, 64, 70, 71, 84, 90, 91, 103))
+
+# All product ids we can decode.
+PRODUCT_IDS = frozenset((413,)) | TWGO_PRODUCT_IDS | BLOCK_PRODUCT_IDS
 
 def decodeApduFrame(ba, frameLength, reserved_2_24, isDetailed):
     """Decode APDU frame and return as dictionary.
@@ -65,8 +74,7 @@ def decodeApduFrame(ba, frameLength, reserved_2_24, isDetailed):
     
     # One check against a trashed message is to check the
     # product ID.
-    if productId not in [413, 8, 11, 12, 13, 14, 15, 16, 63, \
-                         17, 64, 103, 84, 70, 71, 90, 91]:
+    if productId not in PRODUCT_IDS:
         # Throw an exception
         raise ex.BadApduProductIdException("Unknown product id of {}."\
                                            .format(productId))
@@ -150,10 +158,10 @@ def decodeApduFrame(ba, frameLength, reserved_2_24, isDetailed):
     # Handle each product
     if productId == 413:
         d['contents'] = apdu_413(ba[payloadStartingByte:])
-    elif productId in [8, 11, 12, 13, 14, 15, 16, 17]:
+    elif productId in TWGO_PRODUCT_IDS:
         d['contents'] = apdu_twgo(ba[payloadStartingByte:], \
                                   productId, isDetailed)
-    elif productId in [63, 64, 70, 71, 84, 90, 91, 103]:
+    elif productId in BLOCK_PRODUCT_IDS:
         d['contents'] = apdu_global_block(ba[payloadStartingByte:], \
                                           productId, isDetailed)
     
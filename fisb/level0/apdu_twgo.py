@@ -63,6 +63,9 @@ def apdu_twgo(ba, productId, isDetailed):
     Args:
         ba (byte array): Byte array containing the TWGO data. ``ba[0]`` is
             position at the first byte of the TWGO payload header.
+            Any object supporting the buffer protocol can be used.
+            Passing a ``memoryview`` avoids copying the payload
+            when the record bytes are sliced off.
         productId (int): Needed for G-AIRMET which has
             different behavior for its specific product type.
         isDetailed (bool): If ``True``, provided more detailed information in the
@@ -50,9 +50,9 @@ DIGIT_TO_HEX = '0123456789ABCDEF'
 #
 # Value of 0 implies no TIS-B information transmitted. See
 # ACP-WGW01-WP08-R1-UAT Tech Manual.
-TISB_TIER_LOOKUP = ["NO-TISB", "S4", "S3", "S2", "S1", "L5", "L4", \
+TISB_TIER_LOOKUP = ("NO-TISB", "S4", "S3", "S2", "S1", "L5", "L4", \
                     "L3", "L2", "L1", "M3", "M2", "M1", "H3", \
-                    "H2", "H1"]
+                    "H2", "H1")
 
 def calculateRSR(rsrDict, timeInSecs, ba7, station):
     """Calculate current *Reception Success Rate* (RSR) and store it in the database.
@@ -1,4 +1,4 @@
-import time, sys, os
+import time, sys, os, heapq
 
 class L1Base:
     """Base object for :mod:`fisb.level1.TwgoMatcher` and :mod:`fisb.level1.Unsegmenter`
@@ -27,18 +27,45 @@ class L1Base:
         # of messages.
         self.msgHx = {}
 
+        # Heap of (expunge time, insert time, unique name) tuples
+        # for every item added to pendingMsgs or msgHx. The item
+        # with the earliest expunge time is always first, so
+        # the expunger only looks at items that have expired.
+        self.expungeHeap = []
+
+    def addExpungeItem(self, uniqueName, insertTime):
+        """Schedule a newly added pendingMsgs or msgHx item for expunging.
+
+        Args:
+            uniqueName (tuple): Key of the item in pendingMsgs or msgHx.
+            insertTime (int): Time (in seconds since 1970) the item
+                was added.
+        """
+        heapq.heappush(self.expungeHeap, \
+            (insertTime + self.expungeTimeSecs, insertTime, uniqueName))
+
     def expungeItems(self, currentTime):
-        """Delete all items in pendingMsgs whose last entry > expungeTime
+        """Delete all items in pendingMsgs and msgHx whose last entry > expungeTime
+
+        Heap entries whose item has already been removed (or removed
+        and added again) are discarded.
 
         Args:
             currentTime (int): Current time (in seconds since 1970).
         """
+        expungeHeap = self.expungeHeap
 
         # Delete expired entries
+        while (len(expungeHeap) > 0) and (expungeHeap[0][0] <= currentTime):
+            (_, insertTime, uniqueName) = heapq.heappop(expungeHeap)
 
-        msgHxKeys = list(self.msgHx.keys())
-        for x in msgHxKeys:
-            lastUpdate = self.msgHx[x]['last_update_time']
+            msgHxRecord = self.msgHx.get(uniqueName)
+            if (msgHxRecord is not None) and \
+                (msgHxRecord['last_update_time'] == insertTime):
+                del self.msgHx[uniqueName]
+                continue
 
-            if (currentTime - lastUpdate) >= self.expungeTimeSecs:
-                del self.msgHx[x]
+            pendingSegments = self.pendingMsgs.get(uniqueName)
+            if (pendingSegments is not None) and \
+                (pendingSegments.insert_time == insertTime):
+                del self.pendingMsgs[uniqueName]
@@ -91,7 +91,7 @@ class TwgoMatcher(L1Base):
 
         # Use the first record for recording the id (works
         # for both graphics and text).
-        record = contents['records'][0]
+        record = records[0]
         
         # Allow multiple graphical records, but only one text record.
         if (recordFormat == 2) and \
@@ -102,25 +102,21 @@ class TwgoMatcher(L1Base):
         # Rules for uniqueness vary based on
         # type. See standard B.3.3 for details. Location is especially 
         # needed for D-NOTAMS.
-        location = 'X'
-        month = 0
-        if 'location' in contents:
-            location = contents['location']
-        if 'month' in frame:
-            month = frame['month']
-
-        uniqueName = str(productId) + '-' + str(record['report_year']) + "-" + \
-                     str(record['report_number']) + "-" + location + "-" + str(month)
+        location = contents.get('location', 'X')
+        month = frame.get('month', 0)
+
+        uniqueName = (productId, record['report_year'], \
+                      record['report_number'], location, month)
         
         # Get the msgHx object for this name, or create one
-        if uniqueName in self.msgHx:
-            msgHxRecord = self.msgHx[uniqueName]
-        else:
+        msgHxRecord = self.msgHx.get(uniqueName)
+        if msgHxRecord is None:
             msgHxRecord = {'text_contents': None, \
                         'graphics_contents': None, \
                         'last_update_time': currentTime}
 
             self.msgHx[uniqueName] = msgHxRecord
+            self.addExpungeItem(uniqueName, currentTime)
 
         if recordFormat == 8:
             # Graphical
@@ -174,7 +170,7 @@ class TwgoMatcher(L1Base):
 
             # We have at least a text part. See if we have changed text.
             if msgHxRecord['text_contents']['records'][0]['text'] != \
-                contents['records'][0]['text']:
+                record['text']:
                 # Text is changed. Reset any graphics portion and resend.
                 msgHxRecord['graphics_contents'] = None
                 msgHxRecord['text_contents'] = contents
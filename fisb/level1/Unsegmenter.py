@@ -4,6 +4,66 @@ import fisb.level1.level1Exceptions as ex
 from fisb.level0.apdu_twgo import apdu_twgo
 from fisb.level1.L1Base import L1Base
 
+# Messages with more than this many segments store their segments
+# in a dictionary keyed by segment index, so memory grows with the
+# segments actually received. Smaller messages use a list.
+SPARSE_SEGMENTS_THRESHOLD = 32
+
+class PendingSegments:
+    """Segments of a single message received so far.
+
+    Used as the value of :mod:`fisb.level1.Unsegmenter` ``pendingMsgs``.
+    Uses ``__slots__`` since one of these is touched for every
+    segmented frame.
+
+    Attributes:
+        number_i_need (int): Number of total segments for this msg.
+        number_i_have (int): Number of segments I have.
+        insert_time (int): Time since 1/1/1970 record was created
+            (in seconds).
+        is_sparse (bool): ``True`` if ``segments`` is a dictionary.
+        segments (list or dict): If ``number_i_need`` is no more than
+            ``SPARSE_SEGMENTS_THRESHOLD``, a list of all segments. Length is
+            ``number_i_need``. Entries are initially ``None``.
+            Otherwise, a dictionary of received segments keyed by
+            segment index.
+    """
+    __slots__ = ('number_i_need', 'number_i_have', 'insert_time', \
+                 'is_sparse', 'segments')
+
+    def __init__(self, number_i_need, insertTime):
+        """Initialize entry for the first segment received.
+
+        The caller is expected to store the first segment in ``segments``.
+
+        Args:
+            number_i_need (int): Number of total segments for this msg.
+            insertTime (int): Current system time (secs since 1970).
+        """
+        self.number_i_need = number_i_need
+        self.number_i_have = 1
+        self.insert_time = insertTime
+        self.is_sparse = number_i_need > SPARSE_SEGMENTS_THRESHOLD
+
+        if self.is_sparse:
+            self.segments = {}
+        else:
+            self.segments = [None] * number_i_need
+
+    def orderedSegments(self):
+        """Return all segments as a list in segment order.
+
+        Only call once all segments have been received.
+
+        Returns:
+            list: List of segment frames.
+        """
+        if self.is_sparse:
+            segments = self.segments
+            return [segments[i] for i in range(self.number_i_need)]
+
+        return self.segments
+
 class Unsegmenter(L1Base):
     """Store segmented messages until all parts arrive, then send out as a new frame.
     """
@@ -40,70 +100,63 @@ class Unsegmenter(L1Base):
         """
 
         # Create a unique key for the item consisting of the
-        # product_id and product_file_id.
-        # S added to tell this is a segmented message when expunging.
-        uniqueName = 'S' + str(frame['product_id']) + '-' + \
-                     str(frame['product_file_id'])
+        # product_id and product_file_id. A tuple hashes directly
+        # from the two ints without any string formatting.
+        uniqueName = (frame['product_id'], frame['product_file_id'])
                         
         # This is the index number into the segment array.
         # 'apdu_number' is 1 based
         segment_index = frame['apdu_number'] - 1
 
         # pendingMsgs is a dictionary whose key is
-        # the product_id + '-' + product_file_id.
-        # The contents is another dictionary with the
-        # following keys:
-        #
-        # insert_time time since 1/1/1970 record was created (in minutes)
-        # number_i_need - Number of total segments for this msg
-        # number_i_have - Number of segments I have
-        # segments - List of all segments. Length is 'number_i_need'
-        #            Entries are initially None
+        # the tuple (product_id, product_file_id).
+        # The contents is a PendingSegments object.
 
-        if uniqueName not in self.pendingMsgs:
+        pendingSegments = self.pendingMsgs.get(uniqueName)
+
+        if pendingSegments is None:
             # Make a new entry
             number_i_need = frame['product_file_length']
-            segments = [None] * number_i_need
-
-            itemDict = {}
-            itemDict['number_i_need'] = number_i_need
-            itemDict['insert_time'] = currentTime
-            itemDict['number_i_have'] = 1
 
             if segment_index >= number_i_need:
                 raise ex.SegmentIdxOutOfBoundsException('Segment index: {} Segments Size {}.\n{}'.format(segment_index, number_i_need, json.dumps(frame, indent = 2)))
             
-            segments[segment_index] = frame
-            itemDict['segments'] = segments
-            self.pendingMsgs[uniqueName] = itemDict
+            pendingSegments = PendingSegments(number_i_need, currentTime)
+            pendingSegments.segments[segment_index] = frame
+            self.pendingMsgs[uniqueName] = pendingSegments
+            self.addExpungeItem(uniqueName, currentTime)
             return None
         
         else:
             # Update current entry
-            itemDict = self.pendingMsgs[uniqueName]
+            segments = pendingSegments.segments
 
-            # See if we have the entry
-            segments = itemDict['segments']
+            if pendingSegments.is_sparse:
+                if segment_index in segments:
+                    # Currently have this index. Nothing to do
+                    return None
 
-            if segments[segment_index] is not None:
+                # A list would catch this by itself.
+                if segment_index >= pendingSegments.number_i_need:
+                    raise ex.SegmentIdxOutOfBoundsException('Segment index: {} Segments Size {}.\n{}'.format(segment_index, pendingSegments.number_i_need, json.dumps(frame, indent = 2)))
+
+            elif segments[segment_index] is not None:
                 # Currently have this index. Nothing to do
                 return None
 
             # New segment, add it
             segments[segment_index] = frame
-            number_i_have = itemDict['number_i_have'] + 1
+            number_i_have = pendingSegments.number_i_have + 1
 
             # Check if found all the segments
-            if number_i_have < itemDict['number_i_need']:
+            if number_i_have < pendingSegments.number_i_need:
                 # Not enough yet
-                itemDict['number_i_have'] = number_i_have
-                itemDict['segments'] = segments
-                self.pendingMsgs[uniqueName] = itemDict
+                pendingSegments.number_i_have = number_i_have
                 return None
 
             # Yay, found everything. Create new frame, delete
             # from pendingMsgs
-            newFrame = self.consolidateFrames(segments)
+            newFrame = self.consolidateFrames(pendingSegments.orderedSegments())
 
             del self.pendingMsgs[uniqueName]
             return newFrame
@@ -145,25 +198,37 @@ class Unsegmenter(L1Base):
         del frame['product_file_length']
         del frame['apdu_number']
 
-        # Create the actual byte string to decode
-        byteStr = ''
+        # Create the actual byte string to decode.
+        #
+        # We use the entire byte string for the first element.
+        # This will include the TWGO header.
+        # For the other elements, we have to skip over
+        # the TWGO header (included for every segment and
+        # which is 6 bytes [since it is still a string,
+        # 12 characters]).
+        #
+        # The buffer is sized for the complete message up front and
+        # each segment is decoded into place.
+        totalBytes = len(segments[0]['contents']) // 2
+        for msg in segments[1:]:
+            totalBytes += (len(msg['contents']) - 12) // 2
+
+        byteBuf = bytearray(totalBytes)
 
-        idx = 0
-        for msg in segments:
-            # We use the entire byte string for the first element.
-            # This will include the TWGO header.
+        pos = 0
+        for idx, msg in enumerate(segments):
             if idx == 0:
-                byteStr = msg['contents']
+                segmentBytes = bytes.fromhex(msg['contents'])
             else:
-                # For the other elements, we have to skip over
-                # the TWGO header (included for every segment and
-                # which is 6 bytes [since it is still a string,
-                # 12 characters]).
-                byteStr = byteStr + msg['contents'][12:]
+                segmentBytes = bytes.fromhex(msg['contents'][12:])
 
-            idx += 1
-            
-        newContents = apdu_twgo(bytes.fromhex(byteStr), \
+            nextPos = pos + len(segmentBytes)
+            byteBuf[pos:nextPos] = segmentBytes
+            pos = nextPos
+
+        # apdu_twgo slices the payload, so hand it a memoryview
+        # to keep those slices from copying.
+        newContents = apdu_twgo(memoryview(byteBuf), \
                                 frame['product_id'], False)
         frame['contents'] = newContents
 
@@ -43,20 +43,22 @@ Frame changes:
    are received and a complete message is produced.
 """
 
-import sys, os, json, time, argparse, traceback, glob
+import sys, os, json, time, argparse, traceback
 
 import fisb.level1.level1Config as cfg
 import fisb.level2.utilities as util2
 from fisb.level1.Unsegmenter import Unsegmenter
 from fisb.level1.TwgoMatcher import TwgoMatcher
 
-# Last time we expunged items. Usually happens every 10 minutes
-GLOBAL_lastExpungeTime = -1
+# Message time after which we next expunge items. Usually happens
+# every 30 minutes. -1 until set by the first message.
+GLOBAL_nextExpungeTime = -1
 
-# Results from frameAction
-IGNORE = 0 # Don't add anything to the frame list
-KEEP_NEW = 1 # Add returned frame to the frame list
-KEEP_CURRENT = 2 # Add current frame to the frame list
+# Product ids of TWGO messages with text and graphics parts.
+# *G-AIRMET* (type 14) messages are also TWGO messages. But since
+# they only have a graphics section, they are not worried about by 
+# *level1*. *SUA* (type 13) have only text.
+TWGO_PRODUCT_IDS = frozenset((8, 11, 12, 15, 16, 17))
 
 # Initialize Unsegmented instance
 unsegmenter = Unsegmenter(cfg.SEGMENT_EXPIRE_TIME)
@@ -75,7 +77,7 @@ def level1(msg, ppIndent):
     Returns:
         dict: message dictionary, or ``None`` if message should be skipped.
     """
-    global GLOBAL_lastExpungeTime
+    global GLOBAL_nextExpungeTime
 
     # Decode the JSON message into a dictionary
     msgDict = json.loads(msg)
@@ -90,143 +92,59 @@ def level1(msg, ppIndent):
     if numFrames == 0:
         return msg
 
-    # frameLoop goes through all the frames and
+    # processFrames goes through all the frames and
     # will return a modified list of frames. Removing
     # some, and adding others.
-    # It is called one time for each of the message
-    # types we need to try and group together.
-
-    # Segmented frames need to happen first since they
-    # may return frames needed for processes that happen
-    # after.
-    newFrameList = frameLoop(frames, \
-                              frameTestSegmented, \
-                              frameActionSegmented, \
-                              currentTime)
-
-    # TWGO  (type 8, 11, 12, 15, 16, 17).
-    newFrameList = frameLoop(newFrameList, \
-                              frameTestTwgo, \
-                              frameActionTwgo, \
-                              currentTime)
-
-    # Update the message with the new frame list.
-    msgDict['frames'] = newFrameList
-
-    # See if time to expunge items
-    if GLOBAL_lastExpungeTime != -1:
-        if (currentTime - GLOBAL_lastExpungeTime) > \
-           (cfg.EXPUNGE_CHECK_MINUTES * 60):
+    newFrameList = processFrames(frames, currentTime)
 
+    # See if time to expunge items. Only a single compare
+    # is needed for the usual case of not being time yet.
+    if currentTime > GLOBAL_nextExpungeTime:
+        if GLOBAL_nextExpungeTime != -1:
             # Run expunger for all message types
             unsegmenter.expungeItems(currentTime)
             twgoMatcher.expungeItems(currentTime)
 
-            GLOBAL_lastExpungeTime = currentTime
-    else:
-        # Set once for each program run
-        GLOBAL_lastExpungeTime = currentTime
-        
-    # Turn the modified object (or not) back into a JSON string.
-    return json.dumps(msgDict, indent = ppIndent)
-
-def frameTestSegmented(frame):
-    """Test for segmented messages.
-
-    Args:
-        frame (dict): Frame to test
-    
-    Returns:
-        bool: ``True`` if this is a segmented message, else ``False``.
-    """
-    # Ignore non-segmented messages
-    if frame['s_flag'] != 1:
-        return False
-    return True
-
-def frameActionSegmented(frame, currentTime):
-    """Process segmented message.
-
-    Args:
-        frame (dict): Frame to process.
-        currentTime (int): Current time, seconds since 1970.
-
-    Returns:
-        tuple: Tuple of two items. Either:
-        
-        * (``KEEP_NEW``, new-message) if we have
-          reconstructed a segmented message. Or:
-        * (``IGNORE``, ``None``) if no new message.
-    """
-    # newMsg is None if this msg didn't complete the series
-    # or a new frame item for returning.
-    newMsg = unsegmenter.processFrame(frame, currentTime)
-
-    if newMsg is not None:
-        return (KEEP_NEW, newMsg)
-    else:
-        return (IGNORE, None)
-
-def frameTestTwgo(frame):
-    """Test for TWGO messages (type 8, 11, 12, 15, 16, 17)
-
-    *G-AIRMET* (type 14) messages are also TWGO messages. But since
-    they only have a graphics section, they are not worried about by 
-    *level1*. *SUA* (type 13) have only text.
-
-    Args:
-        frame (dict): Frame to test
-    
-    Returns:
-        bool: ``True`` if this is a TWGO message, else ``False``.
-    """
-    # Ignore non-TWGO messages
-    if (frame['product_id'] in [8, 11, 12, 15, 16, 17]):
-        return True
-    return False
+        GLOBAL_nextExpungeTime = currentTime + (cfg.EXPUNGE_CHECK_MINUTES * 60)
 
-def frameActionTwgo(frame, currentTime):
-    """Process TWGO message (types 8, 11, 12, 15, 16, 17)
-
-    Args:
-        frame (dict): Frame to process
-        currentTime (int): Current time, seconds since 1970.
+    # If no frame needed any processing, the message is unchanged.
+    # Send the original string rather than encoding it again.
+    if (newFrameList is frames) and (ppIndent is None):
+        return msg
 
-    Returns:
-        tuple: Tuple of two items. Either:
-        
-        * (``KEEP_NEW``, new-message) if we have
-          reconstructed a segmented message. Or:
-        * (``KEEP_CURRENT``, ``None``) if no new message and we should keep
-          the current one.
-    """
-    # newMsg is None if this wasn't a TWGO with
-    # a matching graphic. Just send it along.
-    newMsg = twgoMatcher.processFrame(frame, currentTime)
+    # Update the message with the new frame list.
+    msgDict['frames'] = newFrameList
 
-    if newMsg is not None:
-        return (KEEP_NEW, newMsg)
-    else:
-        return (IGNORE, None)
+    # Turn the modified object back into a JSON string.
+    return json.dumps(msgDict, indent = ppIndent)
 
-def frameLoop(frames, frameTest, frameAction, currentTime):
+def processFrames(frames, currentTime):
     """Loop over all frames and process them, returning new frame list.
 
-    Called for each type of message we wish to process.
+    Each frame is only visited once. Segmented frames are handled
+    first since a completed segmented message may produce a frame
+    needed by the TWGO (type 8, 11, 12, 15, 16, 17) matcher. Any such
+    frame is then handed to the TWGO matcher in the same pass.
 
     Args:
         frames (list): List of frames from message.
-        frameTest (function): Function that tests if this message is
-            a type of message ``frameAction`` should process.
-        frameAction (function): Function that processes the frame and
-            returns a tuple describing what to do with any message returned.
         currentTime (int): Current time, seconds since 1970.
 
     Returns:
-        list: List of modified frames with changes.
+        list: List of modified frames with changes. If no frame needed
+        processing, ``frames`` itself is returned.
     """
     newFrameList = []
 
+    # Set if any frame was handed to a frame processor.
+    isProcessed = False
+
+    # Local names for the frame processors. Each returns
+    # ``None`` if there is no frame to send out (yet), or
+    # the (possibly new) frame to send out.
+    processSegmented = unsegmenter.processFrame
+    processTwgo = twgoMatcher.processFrame
+
     for frame in frames:
         # Only APDU frames are even considered. All others
         # just get passed through.
@@ -234,35 +152,52 @@ def frameLoop(frames, frameTest, frameAction, currentTime):
             newFrameList.append(frame)
             continue
 
-        # See if frame passes our supplied test.
-        if not frameTest(frame):
-            newFrameList.append(frame)
-            continue    
+        # A completed segmented message keeps its product_id,
+        # so we can tell up front if it goes to the TWGO matcher.
+        isTwgo = frame['product_id'] in TWGO_PRODUCT_IDS
 
-        # Did pass the test. Not process the message using
-        # supplied function.
-        (action, resultFrame) = frameAction(frame, currentTime)
+        # Segmented frames.
+        if frame['s_flag'] == 1:
+            isProcessed = True
+            frame = processSegmented(frame, currentTime)
+            if frame is None:
+                continue
 
-        if action == IGNORE:
-            pass
-        elif action == KEEP_CURRENT:
-            newFrameList.append(frame)
-        elif action == KEEP_NEW:
-            newFrameList.append(resultFrame)
+        # TWGO (type 8, 11, 12, 15, 16, 17).
+        if isTwgo:
+            isProcessed = True
+            frame = processTwgo(frame, currentTime)
+            if frame is None:
+                continue
+
+        newFrameList.append(frame)
+
+    if not isProcessed:
+        return frames
 
     return newFrameList
 
-def dumpRecord(reason, line):
+def dumpRecord(reason, msg):
     """Write current msg to the error file for any decoding issues.
 
+    A message string is written as is with a single leading ``#``.
+    It is not parsed again just to pretty print it (and it may not
+    even be valid JSON, which is often why we are here).
+
     Args:
         reason (str): Explanation of the error.
-        line (str): message to dump.
+        msg (str or dict): message to dump. Dictionaries are written
+            as indented JSON.
     """
+    if isinstance(msg, dict):
+        msg = json.dumps(msg, indent = 2)
+    else:
+        msg = "#" + msg
+
     with open(cfg.ERROR_FILENAME, "a") as f:
         f.write("-------------------------------------------------------------\n")
         f.write("#" + reason + "\n")
-        f.write(json.dumps(json.loads(line), indent = 2) + "\n\n")
+        f.write(msg + "\n\n")
 
 def processLine(line, ppIndent):
     """Process a line through level1, catching exceptions.
@@ -276,7 +211,7 @@ def processLine(line, ppIndent):
         Exception: For any error.
     """
     try:
-        print(level1(line, ppIndent), flush=True)
+        print(level1(line, ppIndent))
 
     except Exception as _:
         # Error, place in errored out message file
@@ -305,10 +240,17 @@ if __name__ == "__main__":
 
     if cfg.READ_MESSAGES_FROM_FILE:
         # Read all messages from file.
-        path = os.path.join(cfg.READ_MESSAGES_DIRECTORY, '*.msg')
-
         while True:
-            fileList = sorted(glob.glob(path))
+            # Filenames are based on creation time, so sorting by
+            # name processes them in the order they were written.
+            # Like a '*.msg' glob, hidden files are skipped. So is
+            # anything that isn't a file.
+            with os.scandir(cfg.READ_MESSAGES_DIRECTORY) as dirIter:
+                fileList = sorted(e.path for e in dirIter \
+                                  if e.name.endswith('.msg') and \
+                                  (not e.name.startswith('.')) and \
+                                  e.is_file())
+
             if len(fileList) == 0:
                 time.sleep(1)
                 continue
@@ -325,6 +267,8 @@ if __name__ == "__main__":
                 # Process
                 line = line.strip()
                 processLine(line, ppIndent)
+
+            sys.stdout.flush()
     else:
         # Read from stdin
         for line in sys.stdin:
@@ -332,9 +276,11 @@ if __name__ == "__main__":
 
             # Skip over blank lines pass along comments
             if len(line) == 0:
-                continue
-            if (line[0] == '#'):
-                print(line, flush=True)
-                continue            
+                pass
+            elif (line[0] == '#'):
+                print(line)
+            else:
+                processLine(line, ppIndent)
 
-            processLine(line, ppIndent)
+            # Only flush when we are about to wait for more input.
+            util2.flushIfInputIdle(sys.stdin, sys.stdout)
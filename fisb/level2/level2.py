@@ -28,7 +28,8 @@ Any messages that should not be decoded (according to DO-358B)
 will be flushed at this level (unless you have the configuration files
 set to allow ``SUA`` messages).
 """
-import sys, os, json, time, argparse, traceback, pprint
+import sys, os, io, json, time, argparse, traceback, pprint, atexit
+import collections, contextlib, itertools, concurrent.futures
 
 import fisb.level2.level2Config as cfg
 import fisb.level2.level2Exceptions as ex
@@ -43,46 +44,171 @@ from fisb.level2.msg11_12_15 import msg11_12_15
 from fisb.level2.msg14 import msg14
 from fisb.level2.msg13 import msg13
 
+# Only import orjson if asked to use it
+if cfg.USE_ORJSON:
+    import orjson
+
+# Error file. Opened on the first error and kept open.
+errorFile = None
+
+# JSON encode functions keyed by indent value. Each encoder is
+# only created once, rather than by json.dumps() for every message.
+jsonEncoders = {}
+
+def jsonEncoder(ppIndent):
+    """Return a function that encodes an object as a JSON string.
+
+    Args:
+        ppIndent (int): Number of characters to indent for pretty printing.
+
+    Returns:
+        function: ``encode`` method of a ``json.JSONEncoder`` with
+        ``ppIndent`` as its indent, or an ``orjson`` equivalent
+        if ``USE_ORJSON`` is set.
+    """
+    encode = jsonEncoders.get(ppIndent)
+
+    if encode is None:
+        if cfg.USE_ORJSON:
+            if ppIndent is None:
+                option = 0
+            else:
+                # orjson only supports an indent of 2.
+                option = orjson.OPT_INDENT_2
+
+            encode = lambda x: orjson.dumps(x, option = option).decode()
+        else:
+            encode = json.JSONEncoder(indent = ppIndent).encode
+
+        jsonEncoders[ppIndent] = encode
+
+    return encode
+
+# 'rcvd_time' down to the minute of the last message, and the
+# (year, month, day, hour, minute) integers parsed from it.
+lastRcvdMinute = None
+lastRcvdComponents = None
+
+# 'rcvd_time' of the last message without the fractional seconds,
+# and the same time as ISO-8601 in seconds with a trailing 'Z'.
+lastRcvdSecond = None
+lastRcvdIso = None
+
 def dumpRecord(reason, frame):
     """Write current frame to the error file for any decoding issues.
 
+    The error file is only opened once, on the first error, and
+    each record is written with a single write.
+
     Args:
         reason (str): Error description.
         frame (dict): Dictionary containing frame to display.
     """
-    with open(cfg.ERROR_FILENAME, "a") as f:
-        f.write("-------------------------------------------------------------\n")
-        f.write("#" + reason + "\n")
-        msgJson = json.dumps(frame, indent = 2)
-        f.write(msgJson + "\n\n")
+    global errorFile
+
+    if errorFile is None:
+        errorFile = open(cfg.ERROR_FILENAME, "a")
+        atexit.register(errorFile.close)
+
+    msgJson = json.dumps(frame, indent = 2)
+    errorFile.write("-------------------------------------------------------------\n" + \
+                    "#" + reason + "\n" + \
+                    msgJson + "\n\n")
+
+    # Keep the file current in case we are killed.
+    errorFile.flush()
 
-def TwgoSanityCheck(frameSection, frame):
+#: Legal TWGO ``record_format`` values.
+TWGO_RECORD_FORMATS = frozenset((2, 8))
+
+#: Legal TWGO ``record_reference_point`` values.
+TWGO_RECORD_REFERENCE_POINTS = frozenset((0, 255))
+
+def TwgoSanityCheck(frame):
     """Return ``True`` if TWGO message contains valid values, else ``False``.
 
-    We check that the 'record format' is 2 or 8 and the 'record reference point' is 0 or 255.
+    We check that the 'record format' is 2 or 8 and the 'record reference point' is 0 or 255
+    for each of the frame's ``contents``, ``contents_text`` and ``contents_graphics``
+    sections that are present.
 
     Args:
-        frameSection (str): One of '``contents``', '``contents_text``' or '``contents_graphics``'
-        frame (dict): TWGO message frame.
+        frame (dict): TWGO frame.
 
     Returns:
         bool: True if passes checks, else False.
     """
-    # Standard says ignore record_format if not 2 or 8
-    framePart = frame[frameSection]
-    recordFormat = framePart['record_format']
-    if not ((recordFormat == 2) or \
-                (recordFormat == 8)):
-        return False
-
-    # Standard says ignore record_reference_point if not 0 or 255
-    recordReferencePoint = framePart['record_reference_point']
-    if not ((recordReferencePoint == 0) or \
-                (recordReferencePoint == 255)):
-        return False
+    frameGet = frame.get
+
+    for framePart in (frameGet('contents'), frameGet('contents_text'), \
+                      frameGet('contents_graphics')):
+        # Standard says ignore record_format if not 2 or 8, and
+        # record_reference_point if not 0 or 255.
+        if (framePart is not None) and \
+           not ((framePart['record_format'] in TWGO_RECORD_FORMATS) and \
+                (framePart['record_reference_point'] in TWGO_RECORD_REFERENCE_POINTS)):
+            return False
 
     return True
 
+# Frame handlers for APDU product ids other than global block messages.
+# Each is called with the same arguments:
+#
+# frame, productId, rYear, rMonth, rDay, rHour, rMin,
+# month, day, hour, minute, station, rcvdTime
+#
+# and returns the completed message or ``None``.
+
+def handle413(frame, productId, rYear, rMonth, rDay, rHour, rMin, \
+              month, day, hour, minute, station, rcvdTime):
+    """Text messages (METAR, TAF, PIREP, WINDS, ...)."""
+    return msg413(frame, rYear, rMonth, rDay, \
+                  rHour, rMin, \
+                  hour, minute, rcvdTime)
+
+def handle13(frame, productId, rYear, rMonth, rDay, rHour, rMin, \
+             month, day, hour, minute, station, rcvdTime):
+    """SUA messages."""
+    return msg13(frame['contents']['records'][0], \
+                 rYear, rMonth, rDay)
+
+def handle14(frame, productId, rYear, rMonth, rDay, rHour, rMin, \
+             month, day, hour, minute, station, rcvdTime):
+    """G-AIRMET messages."""
+    contents = frame['contents']
+
+    return msg14(contents['records'], \
+                 contents['record_count'], productId, \
+                 rYear, rMonth, rDay, rHour, rMin, \
+                 month, day, hour, minute, station, rcvdTime)
+
+def handle8_16_17(frame, productId, rYear, rMonth, rDay, rHour, rMin, \
+                  month, day, hour, minute, station, rcvdTime):
+    """NOTAM type messages."""
+    return msg8_16_17(frame['contents_text'], \
+                      frame.get('contents_graphics'), productId, \
+                      rYear, rMonth, rDay, \
+                      month, day, hour, minute, station, rcvdTime)
+
+#: Handler to call for each product id. Standard TWGO messages
+#: (11, 12, 15) already take the handler arguments.
+PRODUCT_HANDLERS = {
+    413: handle413,
+    13: handle13,
+    14: handle14,
+    11: msg11_12_15,
+    12: msg11_12_15,
+    15: msg11_12_15,
+    8: handle8_16_17,
+    16: handle8_16_17,
+    17: handle8_16_17
+}
+
+#: TWGO product ids. These get sanity checked before decoding.
+TWGO_PRODUCT_IDS = frozenset((8, 11, 12, 13, 14, 15, 16, 17))
+
+#: Global block product ids.
+BLOCK_PRODUCT_IDS = frozenset((63, 64, 70, 71, 84, 90, 91, 103))
+
 def level2(msg, ppIndent):
     """Process level 2 messages.
 
@@ -95,13 +221,18 @@ def level2(msg, ppIndent):
     The output from level 2 is then usually sent to level 3.
 
     Args:
-        msg (str): JSON string of the message from level 1.
+        msg (str or bytes): JSON string of the message from level 1.
         ppIndent (int): Number of characters to indent for pretty printing.
 
     Raises:
         Exception: For any errors detected. All errors are placed in an error file.
     """
-    msg = json.loads(msg)
+    global lastRcvdMinute, lastRcvdComponents, lastRcvdSecond, lastRcvdIso
+
+    if cfg.USE_ORJSON:
+        msg = orjson.loads(msg)
+    else:
+        msg = json.loads(msg)
 
     # Flush message if app_data_valid is not 1.
     if msg['app_data_valid'] != 1:
@@ -115,27 +246,40 @@ def level2(msg, ppIndent):
     ##if msg['position_valid'] != 1:
     ##    return
 
+    frames = msg['frames']
+        
+    # See if there are any frames
+    numFrames = len(frames)
+    if numFrames == 0:
+        return
+
     # Get the time the message was received
     # Break it into rYear, rMonth, rDay, rHour
     # and rMin so we don't to reparse it for each frame.
+    # Many messages in a row are received in the same minute,
+    # so reuse the last values if the minute hasn't changed.
     rcvdTime = msg['rcvd_time']
     station = msg['station']
-    rYear = int(rcvdTime[0:4])
-    rMonth = int(rcvdTime[5:7])
-    rDay = int(rcvdTime[8:10])
-    rHour = int(rcvdTime[11:13])
-    rMin = int(rcvdTime[14:16])
+
+    rcvdMinute = rcvdTime[0:16]
+    if rcvdMinute != lastRcvdMinute:
+        lastRcvdComponents = (int(rcvdTime[0:4]), int(rcvdTime[5:7]), \
+                              int(rcvdTime[8:10]), int(rcvdTime[11:13]), \
+                              int(rcvdTime[14:16]))
+        lastRcvdMinute = rcvdMinute
+
+    (rYear, rMonth, rDay, rHour, rMin) = lastRcvdComponents
     
     # rcvdTime is in microseconds, which we don't need at this point.
-    # Convert to seconds
-    rcvdTime = rcvdTime[0:19] + 'Z'
+    # Convert to seconds. Also reused while the second hasn't changed.
+    rcvdSecond = rcvdTime[0:19]
+    if rcvdSecond != lastRcvdSecond:
+        lastRcvdIso = rcvdSecond + 'Z'
+        lastRcvdSecond = rcvdSecond
 
-    frames = msg['frames']
-        
-    # See if there are any frames
-    numFrames = len(frames)
-    if numFrames == 0:
-        return
+    rcvdTime = lastRcvdIso
+
+    encode = jsonEncoder(ppIndent)
 
     for frame in frames:
         # msg will get any completed message
@@ -171,59 +315,19 @@ def level2(msg, ppIndent):
                 productId = frame['product_id']
 
                 # TWGO Sanity checks
-                if productId in [8, 11, 12, 13, 14, 15, 16, 17]:
-                    if ('contents' in frame) and not TwgoSanityCheck('contents', frame):
-                        continue
-                    if ('contents_text' in frame) and not TwgoSanityCheck('contents_text', frame):
-                        continue
-                    if ('contents_graphics' in frame) and not TwgoSanityCheck('contents_graphics', frame):
-                        continue
+                if (productId in TWGO_PRODUCT_IDS) and (not TwgoSanityCheck(frame)):
+                    continue
 
                 # Process all frame type 0 messages based on product id.
+                handler = PRODUCT_HANDLERS.get(productId)
+
+                if handler is not None:
+                    msg = handler(frame, productId, \
+                                  rYear, rMonth, rDay, rHour, rMin, \
+                                  month, day, hour, minute, station, rcvdTime)
 
-                # Text messages
-                if (productId == 413):
-                    msg = msg413(frame, rYear, rMonth, rDay, \
-                    rHour, rMin, \
-                    hour, minute, rcvdTime)
-
-                # G_AIRMET, SUA messages
-                elif productId in [13, 14]:
-                    
-                    recordCount = frame['contents']['record_count']
-
-                    if productId == 13:
-                        msg = msg13(frame['contents']['records'][0], \
-                                    rYear, rMonth, rDay)
-
-                    elif productId == 14:
-                        msg = msg14(frame['contents']['records'], \
-                                    recordCount, productId, \
-                                    rYear, rMonth, rDay, rHour, rMin, \
-                                    month, day, hour, minute, station, rcvdTime)
-
-                elif productId in [11, 12, 15]:
-                    # Standard TWGO checks
-
-                    msg = msg11_12_15(frame, \
-                                          productId, \
-                                          rYear, rMonth, rDay, rHour, rMin, \
-                                          month, day, hour, minute, station, rcvdTime)                        
-
-                # NOTAM type messages
-                elif productId in [8, 16, 17]:
-                    if 'contents_graphics' in frame:
-                        contents_graphics = frame['contents_graphics']
-                    else:
-                        contents_graphics = None
-    
-                    msg = msg8_16_17(frame['contents_text'], \
-                            contents_graphics, productId, \
-                            rYear, rMonth, rDay, \
-                            month, day, hour, minute, station, rcvdTime)
-                            
                 # Global Block messages
-                elif productId in [63, 64, 103, 84, 70, 71, 90, 91]:
+                elif productId in BLOCK_PRODUCT_IDS:
                     # Block messages are slightly different in that
                     # under certain circumstances, a single empty block
                     # message can generate multiple output messages.
@@ -233,9 +337,9 @@ def level2(msg, ppIndent):
                                    rYear, rMonth, rDay, rHour, rMin,
                                    hour, minute)
 
-                    for x in msgList:
-                        msgJson = json.dumps(x, indent = ppIndent)
-                        print(msgJson, flush=True)
+                    # Written with a single print.
+                    if msgList:
+                        print('\n'.join(map(encode, msgList)))
 
                     msg = None
                 else:
@@ -249,16 +353,59 @@ def level2(msg, ppIndent):
                 # Service Status
                 msg = msgServiceStatus(rcvdTime, frame, station)
             
-        except Exception as _:
-            # Error, place in errored out message file
-            errList = traceback.format_exc(limit=10)
-            errStr = errList.replace("\n", "\n# ")
+        except Exception as e:
+            # Error, place in errored out message file. Our own
+            # exceptions are frames we rejected on purpose, and
+            # their message says why. Anything else is unexpected,
+            # so always include the traceback.
+            if cfg.VERBOSE_ERRORS or (type(e).__module__ != ex.__name__):
+                errList = traceback.format_exc(limit=10)
+                errStr = errList.replace("\n", "\n# ")
+            else:
+                errStr = '{}: {}'.format(type(e).__name__, e)
+
             dumpRecord(errStr, frame)
             
         # Send any completed message out
         if msg is not None:
-            msgJson = json.dumps(msg, indent = ppIndent)
-            print(msgJson, flush=True)
+            print(encode(msg))
+
+def processLine(line, ppIndent):
+    """Process a single input line through level2.
+
+    Comments are passed along as is.
+
+    Args:
+        line (bytes): Input line with whitespace stripped.
+        ppIndent (int): Number of characters to indent for pretty printing.
+    """
+    if line[:1] == b'#':
+        # Pass along comments.
+        print(line.decode())
+    else:
+        level2(line, ppIndent)
+
+def processBatch(lines, ppIndent):
+    """Process a batch of input lines and return the output as a string.
+
+    Used by worker processes when ``--workers`` is given. Anything
+    level2 would print is collected and returned instead, so the
+    main process can write batches in the order they were read.
+
+    Args:
+        lines (list): List of input lines (bytes).
+        ppIndent (int): Number of characters to indent for pretty printing.
+
+    Returns:
+        str: Output for all lines in the batch.
+    """
+    out = io.StringIO()
+
+    with contextlib.redirect_stdout(out):
+        for line in lines:
+            processLine(line.strip(), ppIndent)
+
+    return out.getvalue()
 
 if __name__ == "__main__":
     ## --- Script Code ---##
@@ -267,6 +414,7 @@ if __name__ == "__main__":
                                      Filter FIS-B messages into forms suitable for storage.
                                      """)
     parser.add_argument('--pp', help="Pretty Print output. Can't be set if it will be parsed by JSON.", action='store_true')
+    parser.add_argument('--workers', help="Number of worker processes. Only useful for bulk processing of stored messages. Default is 1 (no worker processes).", type=int, default=1)
     args = parser.parse_args()
 
     # ppIndent -- number of spaces to indent JSON string. 2 for indenting 2, None for no indent.
@@ -276,14 +424,32 @@ if __name__ == "__main__":
     if args.pp:
         ppIndent = 2
 
-    # Main loop
-    for line in sys.stdin:
-        line = line.strip()
-
-        if len(line) > 0:
-            if line[0] == '#':
-                # Pass along comments.
-                print(line, flush=True)
-                continue
-
-        level2(line, ppIndent)
+    # Input is read as bytes. Both json and orjson
+    # decode bytes directly, so there is no need to have the
+    # text layer decode each line first.
+    if args.workers > 1:
+        # Each line is independent of the others, so batches of lines
+        # can be processed in parallel. Batches are written out in the
+        # order they were read. Only a few batches per worker are in
+        # flight at once, so input is not read all at once.
+        batches = iter(lambda: list(itertools.islice(sys.stdin.buffer, \
+                                                     cfg.WORKER_BATCH_SIZE)), [])
+        pending = collections.deque()
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers = args.workers) as executor:
+            for batch in batches:
+                pending.append(executor.submit(processBatch, batch, ppIndent))
+
+                if len(pending) >= (args.workers * 2):
+                    sys.stdout.write(pending.popleft().result())
+
+            while pending:
+                sys.stdout.write(pending.popleft().result())
+    else:
+        # Main loop
+        for line in sys.stdin.buffer:
+            processLine(line.strip(), ppIndent)
+
+            # Output is buffered. Only flush when we are about to
+            # wait for more input.
+            util.flushIfInputIdle(sys.stdin, sys.stdout)
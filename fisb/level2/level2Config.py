@@ -5,6 +5,27 @@
 #: Filename used to record frames that error out during decoding.
 ERROR_FILENAME = 'LEVEL2.ERR'
 
+#: If ``True``, frames written to ``ERROR_FILENAME`` include a
+#: traceback of where the error occurred. If ``False``, frames
+#: rejected with one of the :mod:`fisb.level2.level2Exceptions`
+#: exceptions only have the exception type and message written.
+#: Any other exception is unexpected and always gets a traceback.
+#: Formatting the traceback is by far the most expensive part of
+#: handling a bad frame, so set this to ``False`` if you see a lot
+#: of errors and don't need the detail.
+VERBOSE_ERRORS = True
+
+#: If ``True``, use the ``orjson`` package (``pip3 install orjson``)
+#: to read and write JSON. It is several times faster than the standard
+#: ``json`` module. Output is compact JSON with no spaces after ``:``
+#: and ``,``, so it is not byte for byte the same as with ``False``
+#: (level3 and Harvest read either one).
+USE_ORJSON = False
+
+#: Number of input lines handed to a worker process at a time
+#: when level2 is run with ``--workers``.
+WORKER_BATCH_SIZE = 1000
+
 #: Number of minutes after a METAR observation time to expire the METAR.
 #: There is no set time in the standard, so this is usually set to 120
 #: which is twice the time you would expect a new message.
@@ -8,27 +8,55 @@ This module creates the following messages:
 * CWA
 """
 
-import sys, os, json, time, re
+import sys, os, json, time
 
 import fisb.level2.level2Config as cfg
 import fisb.level2.utilities as util
 import fisb.level2.level2Exceptions as ex
 
-# RegEx for a TWGO
-TWGO_RE = re.compile(r"([^ ]+) ([^ ]+) ([0-3]\d[0-2]\d[0-5]\d)")
-
-# Special case for SIGMET xxxxxx with no station
-TWGO1_RE = re.compile(r"([^ ]+) +([0-3]\d[0-2]\d[0-5]\d)")
-
 #: Sometimes messages get stuck in the system. For over a year, these messages
 #: have been stuck and continue to exist. Hopefully, one day these will
 #: be gone, but until then we have to manually ignore them. This includes putting
 #: special code for the ``CRL`` message (:mod:`fisb.level2.msgCrl`) so that they
 #: are ignored there too.
-BAD_MESSAGES = [\
+BAD_MESSAGES = frozenset((\
     "WST KMKC 062057 CONVECTIVE SIGMET 99C\nFL TN AL MS LA AR TX OK AND FL AL MS LA CSTL WTRS\nFROM 20ENE MEM-20NNW VUZ-110S CEW-50SSW LSU-70NW GGG-10SSW\nFSM-20ENE MEM\nAREA TS MOV LTL. TOPS TO FL410.\n",\
     "WST KMKC 170253 CONVECTIVE SIGMET 3E\nNC AND NC SC CSTL WTRS\nFROM 40S ECG-120SE ECG-200SE ILM-120SSE ILM-30WSW ILM-40S ECG\nAREA EMBD TS MOV FROM 17015KT. TOPS TO FL430.\n"\
-    ]
+    ))
+
+def parseTwgoHeader(text):
+    """Get the report type and issue time from the start of TWGO text.
+
+    The text starts with ``<type> <station> <ddhhmm>``, or for some SIGMETs
+    with no station, ``<type> <ddhhmm>`` (the type may be followed by more
+    than one space). The text is split on spaces rather than using a
+    regular expression.
+
+    Args:
+        text (str): Cleaned up TWGO text.
+
+    Returns:
+        tuple: Tuple of report type and issue time (``ddhhmm``) strings.
+
+    Raises:
+        TwgoHeaderParseException: If the text doesn't start with either form.
+    """
+    parts = text.split(' ', 2)
+
+    # <type> <station> <ddhhmm>
+    if (len(parts) == 3) and (parts[0] != '') and (parts[1] != ''):
+        twgoTime = parts[2][0:6]
+        if util.isDayHourMin(twgoTime):
+            return (parts[0], twgoTime)
+
+    # Special case for SIGMET xxxxxx with no station
+    # <type> +<ddhhmm>
+    if (len(parts) > 1) and (parts[0] != ''):
+        twgoTime = text[len(parts[0]):].lstrip(' ')[0:6]
+        if util.isDayHourMin(twgoTime):
+            return (parts[0], twgoTime)
+
+    raise ex.TwgoHeaderParseException('TWGO header did not match: "{}"'.format(text))
 
 def msg11_12_15(frame, productId, \
                 rYear, rMonth, rDay, rHour, rMin, \
@@ -106,28 +134,15 @@ def msg11_12_15(frame, productId, \
     text = util.cleanFAAText(text)
     
     # Get the report type and issue time.
-    m = TWGO_RE.match(text)
+    (twgo_type, twgo_time) = parseTwgoHeader(text)
 
-    if m is None:
-        # Try to see if station missing
-        m = TWGO1_RE.match(text)
-        if m is None:
-            raise ex.TwgoHeaderParseException('TWGO Regex did not match: "{}"'.format(text))
-        else:
-            twgo_type = m.group(1)
-            twgo_time = m.group(2)
-    else:
-        twgo_type = m.group(1)
-        twgo_time = m.group(3)
-
-    hasGraphics = False
-    if 'contents_graphics' in frame:
-         hasGraphics = True
+    # None if there is no graphics part.
+    contentsGraphics = frame.get('contents_graphics')
         
     issueTimeIso = util.dayHourMinToIso8601(rYear, rMonth, rDay, twgo_time)
     
-    if hasGraphics:
-        gRecords = frame['contents_graphics']['records']
+    if contentsGraphics is not None:
+        gRecords = contentsGraphics['records']
         gRecords0 = gRecords[0]
 
         overlayGeometryOptions = gRecords0['overlay_geometry_options']
@@ -168,7 +183,7 @@ def msg11_12_15(frame, productId, \
     newMsg['unique_name'] = reportId
     newMsg['station'] = station # Don't remove this, needed for CRLs
     newMsg['issued_time'] = issueTimeIso
-    if hasGraphics:
+    if contentsGraphics is not None:
         if startIso is not None:
             newMsg['for_use_from_time'] = startIso
         if stopIso is not None:
@@ -176,7 +191,7 @@ def msg11_12_15(frame, productId, \
 
     newMsg['contents'] = text
 
-    if hasGraphics:
+    if contentsGraphics is not None:
         newMsg['geometry'] = util.processGeometry(gRecords, issueTimeIso, productId)
 
     newMsg['expiration_time'] = util.twgoExpirationTime(newMsg, rcvdTime)
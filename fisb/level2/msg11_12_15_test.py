@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+"""Test data for the msg11_12_15 module in level2.
+"""
+
+import sys, os
+
+import pytest
+
+import fisb.level2.level2Exceptions as ex
+from fisb.level2.msg11_12_15 import parseTwgoHeader
+
+def test_parseTwgoHeader():
+    # <type> <station> <ddhhmm>
+    assert(parseTwgoHeader('AIRMET KKCI 062045 AIRMET ZULU UPDT 2')) == ('AIRMET', '062045')
+    assert(parseTwgoHeader('WST KMKC 170253 CONVECTIVE SIGMET 3E')) == ('WST', '170253')
+    assert(parseTwgoHeader('CWA ZID 311559')) == ('CWA', '311559')
+    assert(parseTwgoHeader('AIRMET KKCI 062045Z')) == ('AIRMET', '062045')
+
+    # SIGMET and AIRMET with no station: <type> +<ddhhmm>
+    assert(parseTwgoHeader('SIGMET 062045 SIGMET NOVEMBER 1')) == ('SIGMET', '062045')
+    assert(parseTwgoHeader('SIGMET   062045')) == ('SIGMET', '062045')
+    assert(parseTwgoHeader('AIRMET 000000')) == ('AIRMET', '000000')
+
+def test_parseTwgoHeaderBad():
+    badHeaders = ['', \
+                  'AIRMET', \
+                  'AIRMET KKCI', \
+                  ' AIRMET KKCI 062045', \
+                  'AIRMET  KKCI 062045', \
+                  'AIRMET KKCI 0620', \
+                  'AIRMET KKCI 412045', \
+                  'AIRMET KKCI 063045', \
+                  'AIRMET KKCI 062060', \
+                  'AIRMET KKCI  062045', \
+                  'SIGMET 06204', \
+                  'SIGMET X062045']
+
+    for header in badHeaders:
+        with pytest.raises(ex.TwgoHeaderParseException):
+            parseTwgoHeader(header)
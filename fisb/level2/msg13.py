@@ -11,15 +11,12 @@ and Broadcast Services Description Document SRT-047, Revision 01
 various fields.
 """
 
-import sys, os, json, time, re
+import sys, os, json, time
 
 import fisb.level2.level2Config as cfg
 import fisb.level2.utilities as util
 import fisb.level2.level2Exceptions as ex
 
-# SUA Regex for 'valid_time'. group(1) -> date, group(2) -> schedule_id
-SUA_RE = re.compile(r"SUA ([0-3]\d[0-2]\d[0-5]\d) (.+)")
-
 def msg13(records0, rYear, rMonth, rDay):
     """Decode SUA product_id 13 messages for appropriate processing
 
@@ -32,8 +29,6 @@ def msg13(records0, rYear, rMonth, rDay):
     Returns:
         dict: Dictionary with completed message.
     """
-    newMsg = {}
-    
     # Create the report id
     reportId = str(records0['report_year']) + '-' + str(records0['report_number'])
 
@@ -41,7 +36,9 @@ def msg13(records0, rYear, rMonth, rDay):
     if records0['report_status'] == 0:
         raise ex.SuaException("SUA cancellations not implemented.")
 
-    # Strip trailing \n off record and break into fields
+    # Strip trailing \n off record and break into fields.
+    # Only the first 15 fields (see below) are used. Anything
+    # after that is ignored.
     text = records0['text'].rstrip()
     textList = text.split('|')
 
@@ -92,35 +89,45 @@ def msg13(records0, rYear, rMonth, rDay):
     # [13] 'dafif_id' DAFIF airspace id
     # [14] 'dafif_name' DAFIF airspace name
 
-    # Decode the valid_time and unique_value
-    m = SUA_RE.match(textList[0])
-    if m is None:
+    # A short or garbled record can't be decoded.
+    if len(textList) < 15:
+        raise ex.SuaException("Expected 15 fields: {}".format(text))
+
+    # Bind the fixed fields [00] - [10] to local names in one
+    # unpack rather than indexing textList for each use.
+    (header, airspaceId, status, airspaceType, airspaceName, \
+     startTime, endTime, lowAltitude, highAltitude, \
+     separationRule, shapeDefined) = textList[:11]
+
+    # Decode the valid_time and schedule_id. header is
+    # 'SUA <ddhhmm> <schedule_id>'. The schedule id ends at any newline.
+    scheduleId = header[11:].split('\n', 1)[0]
+    if (not header.startswith('SUA ')) or \
+        (not util.isDayHourMin(header[4:10])) or \
+        (header[10:11] != ' ') or (scheduleId == ''):
         raise ex.SuaException("Could not decode textList[0]: {}".format(text))
 
-    startTimeIso = util.notamTimeToIso8601(rYear, textList[5])
-    endTimeIso = util.notamTimeToIso8601(rYear, textList[6])
-
-    scheduleId = m.group(2)
-
-    newMsg['type'] = 'SUA'
-    newMsg['unique_name'] = reportId
-    newMsg['airspace_name'] = textList[4]
-    newMsg['start_time'] = startTimeIso
-    newMsg['end_time'] = endTimeIso
-    newMsg['schedule_id'] = scheduleId
-    newMsg['airspace_id'] = textList[1]
-    newMsg['status'] = textList[2]
-    newMsg['airspace_type'] = textList[3]
-    newMsg['low_altitude'] = int(textList[7]) * 100
-    newMsg['high_altitude'] = int(textList[8]) * 100    
+    startTimeIso = util.notamTimeToIso8601(rYear, startTime)
+    endTimeIso = util.notamTimeToIso8601(rYear, endTime)
 
     # Never see a blank separation rule, but change it to 'U'
     # (better value than ' ')
-    if (textList[9] == '') or (textList[9] == ' '):
-        textList[9] = 'U'
-
-    newMsg['separation_rule'] = textList[9]
-    newMsg['shape_defined'] = textList[10]
+    if (separationRule == '') or (separationRule == ' '):
+        separationRule = 'U'
+
+    newMsg = {'type': 'SUA', \
+              'unique_name': reportId, \
+              'airspace_name': airspaceName, \
+              'start_time': startTimeIso, \
+              'end_time': endTimeIso, \
+              'schedule_id': scheduleId, \
+              'airspace_id': airspaceId, \
+              'status': status, \
+              'airspace_type': airspaceType, \
+              'low_altitude': int(lowAltitude) * 100, \
+              'high_altitude': int(highAltitude) * 100, \
+              'separation_rule': separationRule, \
+              'shape_defined': shapeDefined}
 
     # Entries [11 - 14] are either all there, or all missing
     if (textList[11] != ''):
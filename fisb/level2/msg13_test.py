@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+"""Test data for the msg13 module in level2.
+"""
+
+import sys, os
+
+import pytest
+
+import fisb.level2.level2Exceptions as ex
+from fisb.level2.msg13 import msg13
+
+def suaRecord(header):
+    """Return a SUA ``records[0]`` dictionary with the given first field."""
+    return {'report_year': 20, \
+            'report_number': 1234, \
+            'report_status': 1, \
+            'text': header + '|1234|W|R|R4501B|2010300501|2010301129|0|43|A|Y||||\n'}
+
+def test_msg13Header():
+    msg = msg13(suaRecord('SUA 300455 11520'), 2020, 10, 30)
+    assert(msg['schedule_id']) == '11520'
+    assert(msg['start_time']) == '2020-10-30T05:01:00Z'
+    assert(msg['end_time']) == '2020-10-30T11:29:00Z'
+
+    # The schedule id ends at a newline.
+    msg = msg13(suaRecord('SUA 300455 11520\n99'), 2020, 10, 30)
+    assert(msg['schedule_id']) == '11520'
+
+def test_msg13ExtraFields():
+    # Fields past the 15th are ignored.
+    records0 = suaRecord('SUA 300455 11520')
+    records0['text'] = 'SUA 300455 11520|1234|W|R|R4501B|2010300501|2010301129|0|43|A|Y|' + \
+        'A1|NAME1|D1|NAME2|EXTRA|MORE\n'
+    msg = msg13(records0, 2020, 10, 30)
+    assert(msg['nfdc_id']) == 'A1'
+    assert(msg['dafif_name']) == 'NAME2'
+
+def test_msg13HeaderBad():
+    badHeaders = ['SUA', \
+                  'SUA 300455', \
+                  'SUA 300455 ', \
+                  'SUA 300455 \n11520', \
+                  'SUA 3004551 11520', \
+                  'SUA 30045 11520', \
+                  'SUA 400455 11520', \
+                  'SUA 303455 11520', \
+                  'SUA 300465 11520', \
+                  'SUA  300455 11520', \
+                  'SUA300455 11520', \
+                  ' SUA 300455 11520', \
+                  'NOTAM 300455 11520']
+
+    for header in badHeaders:
+        with pytest.raises(ex.SuaException):
+            msg13(suaRecord(header), 2020, 10, 30)
+
+def test_msg13ShortRecord():
+    badTexts = ['', \
+                'SUA 300455 11520', \
+                'SUA 300455 11520|1234|W|R|R4501B|2010300501|2010301129|0|43|A|Y\n', \
+                'SUA 300455 11520|1234|W|R|R4501B|2010300501|2010301129|0|43|A|Y|||\n']
+
+    for text in badTexts:
+        records0 = suaRecord('SUA 300455 11520')
+        records0['text'] = text
+        with pytest.raises(ex.SuaException):
+            msg13(records0, 2020, 10, 30)
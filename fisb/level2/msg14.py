@@ -13,6 +13,11 @@ import fisb.level2.level2Config as cfg
 import fisb.level2.utilities as util
 import fisb.level2.level2Exceptions as ex
 
+# Forecast hour implied by the 'HH:MM' of the stop time
+# (see table A-52 in DO-358B).
+G_AIRMET_FORECAST_HOURS = {'00:00': 0, '03:00': 3, '06:00': 0, '09:00': 3, \
+                           '12:00': 0, '15:00': 3, '18:00': 0, '21:00': 3}
+
 def msg14(records, recordCount, productId, \
                 rYear, rMonth, rDay, rHour, rMin, \
                 month, day, hour, minute, station, rcvdTime):
@@ -57,13 +62,11 @@ def msg14(records, recordCount, productId, \
     # Two digit year
     reportYear = records0['report_year']
 
-    # Full year, instead of two digits
-    reportFullYear = util.doubleDigitYear(rYear, reportYear, False)
-    
     # Create the report id
     reportId = str(reportYear) + '-' + str(records0['report_number'])
 
-    # Handle special case of a cancelled product.
+    # Handle special case of a cancelled product. Only needs the
+    # report id, so is done before any other decoding.
     if records0['object_status'] == 13:
         newMsg = {}
         newMsg['type'] = 'CANCEL_G_AIRMET'
@@ -73,6 +76,9 @@ def msg14(records, recordCount, productId, \
 
         return newMsg
 
+    # Full year, instead of two digits
+    reportFullYear = util.doubleDigitYear(rYear, reportYear, False)
+    
     overlayGeometryOptions = records0['overlay_geometry_options']
 
     # Sanity checks. Make sure nothing unexpected tries to sneak by.
@@ -97,8 +103,6 @@ def msg14(records, recordCount, productId, \
                                        records0['stop_hour'], \
                                        records0['stop_minute'])
 
-    fcHour = -1 # forecastHour
-    
     if (startIso == stopIso):
         fcHour = 6
 
@@ -106,22 +110,9 @@ def msg14(records, recordCount, productId, \
         # ISO needs 3 hours added to it.
         stopIso = util.addHoursToIso8601(startIso, 3)
         
-    elif 'T00:00' in stopIso:
-        fcHour = 0
-    elif 'T03:00' in stopIso:
-        fcHour = 3
-    elif 'T06:00' in stopIso:
-        fcHour = 0
-    elif 'T09:00' in stopIso:
-        fcHour = 3
-    elif 'T12:00' in stopIso:
-        fcHour = 0
-    elif 'T15:00' in stopIso:
-        fcHour = 3
-    elif 'T18:00' in stopIso:
-        fcHour = 0
-    elif 'T21:00' in stopIso:
-        fcHour = 3
+    else:
+        # stopIso is 'YYYY-MM-DDTHH:MM:SSZ'
+        fcHour = G_AIRMET_FORECAST_HOURS.get(stopIso[11:16], -1) # forecastHour
 
     if fcHour == -1:
         raise ex.G_AirmetMessageException('Could not find forecast type: {}'.format(stopIso))
@@ -10,34 +10,31 @@ The following messages are produced from 413 frames:
 * PIREP
 """
 
-import sys, os, json, time, re
+import sys, os, json, time, re, datetime
 
 import fisb.level2.level2Config as cfg
 import fisb.level2.utilities as util
 import fisb.level2.level2Exceptions as ex
 
 # Parse PIREP
-PIREP_RE = re.compile('^(PIREP) ([^ ]+) ([0-9]{6})Z ([^ ]+) (UA|UUA) (.+)')
+PIREP_RE = re.compile('^(PIREP) ([^ ]+) ([0-9]{6})Z ([^ ]+) (UA|UUA) (.+)', re.ASCII)
 
 # Valid PIREP fields. Note the space after /OV. This helps prevents a 
 # bad parse when someone uses '/OVC' in a remark or something.
-PIREP_FIELDS_FROM = ['/OV ', '/TM', '/FL', '/TP', '/TB', '/SK', '/RM',\
-     '/WX', '/TA', '/WV', '/IC']
-PIREP_FIELDS_TO = ['~OV', '~TM', '~FL', '~TP', '~TB', '~SK', '~RM',\
-     '~WX', '~TA', '~WV', '~IC']
+# Used to split the report into field names and their contents.
+PIREP_FIELDS_RE = re.compile('/(OV(?= )|TM|FL|TP|TB|SK|RM|WX|TA|WV|IC)', re.ASCII)
 
 # Parse METAR location and time
-METAR_RE = re.compile('^(METAR|SPECI) ([0-9A-Z]{4}) ([0-9]{6})')
+METAR_RE = re.compile('^(METAR|SPECI) ([0-9A-Z]{4}) ([0-9]{6})', re.ASCII)
 
 # Parse WINDS location and valid time
-WINDS_RE = re.compile('^(WINDS) ([0-9A-Z]{3}) ([0-9]{6})Z')
-
-# Parse TAF location and time
-TAF_RE = re.compile('^(TAF|TAF\\.AMD|TAF COR) ([0-9A-Z]{4}) ([0-9]{6})Z ([0-9]{4})/([0-9]{4})')
+WINDS_RE = re.compile('^(WINDS) ([0-9A-Z]{3}) ([0-9]{6})Z', re.ASCII)
 
+# Parse TAF location and time.
 # Some TAF doesn't have a Zulu time (i.e. TAF KNSE 1815/1915 ...)
-# These seem to be peculiar to Naval Air Stations.
-TAF_RE_NO_Z_TIME = re.compile('^(TAF|TAF\\.AMD|TAF COR) ([0-9A-Z]{4}) ([0-9]{4})/([0-9]{4})')
+# These seem to be peculiar to Naval Air Stations. For these,
+# group 3 (the Zulu time) is None.
+TAF_RE = re.compile('^(TAF|TAF\\.AMD|TAF COR) ([0-9A-Z]{4}) (?:([0-9]{6})Z )?([0-9]{4})/([0-9]{4})', re.ASCII)
 
 # WIND_MATRIX determines type of forecast based on the
 # product available time (APDU) vs valid time (message)
@@ -50,10 +47,25 @@ TAF_RE_NO_Z_TIME = re.compile('^(TAF|TAF\\.AMD|TAF COR) ([0-9A-Z]{4}) ([0-9]{4})
 #  |   2000    |  12    NA    24     6 |
 #  +-----------+-----------------------+
 #
-WIND_MATRIX = [[6, 12, -1, 24], \
-               [24, 6, 12, -1], \
-               [-1, 24, 6, 12], \
-               [12, -1, 24, 6]]
+# Stored as a flat tuple indexed by (paIdx * 4) + vtIdx.
+WIND_MATRIX = (6, 12, -1, 24, \
+               24, 6, 12, -1, \
+               -1, 24, 6, 12, \
+               12, -1, 24, 6)
+
+# Row of WIND_MATRIX (paIdx) for each APDU hour. The product
+# available time is often a little off, so 0100-0259 is 0200, etc.
+WIND_PA_IDX = {1: 0, 2: 0, 7: 1, 8: 1, 13: 2, 14: 2, 19: 3, 20: 3}
+
+# Column of WIND_MATRIX (vtIdx) for each valid time (HHMM as an int).
+WIND_VT_IDX = {600: 0, 1200: 1, 1800: 2, 0: 3}
+
+# For each forecast type from WIND_MATRIX, the product name and the
+# hours to add to the valid time to get the product available time,
+# model run time, for use from time, and for use to time.
+WIND_PRODUCTS = {6:  ('WINDS_06_HR', (-4, -6, -4, 3)), \
+                 12: ('WINDS_12_HR', (-10, -12, -3, 6)), \
+                 24: ('WINDS_24_HR', (-22, -24, -6, 6))}
 
 
 def msg413(frame, rYear, rMonth, rDay, rHour, rMin, \
@@ -84,17 +96,20 @@ def msg413(frame, rYear, rMonth, rDay, rHour, rMin, \
     # Otherwise, holds returned dictionary.
     newMsg = None
 
-    # Dispatch based on type
-    if contents.startswith('METAR') or \
-       contents.startswith('SPECI'):
+    # Dispatch based on type. All types except TAF are 5 characters,
+    # so slice those off once and compare. TAF has variants
+    # ('TAF.AMD', 'TAF COR'), so is checked last.
+    msgType = contents[0:5]
+
+    if (msgType == 'METAR') or (msgType == 'SPECI'):
         newMsg = metar(contents, rYear, rMonth, rDay)
-    elif contents.startswith('TAF'):
-        newMsg = taf(contents, rYear, rMonth, rDay)
-    elif contents.startswith('WINDS'):
+    elif msgType == 'WINDS':
         newMsg = winds(contents, rYear, rMonth, rDay, \
                         hour, minute)
-    elif contents.startswith('PIREP'):
+    elif msgType == 'PIREP':
         newMsg = pirep(contents, rYear, rMonth, rDay, rcvdTime)
+    elif contents.startswith('TAF'):
+        newMsg = taf(contents, rYear, rMonth, rDay)
     else:
         raise ex.Unknown413MessageTypeException("Got unknown 413 message: '{}'".format(contents))
 
@@ -150,55 +165,42 @@ def pirep(contents, rYear, rMonth, rDay, rcvdTime):
     if parsed == None:
         raise ex.RegexDidNotMatchException('PIREP did not match template.')
 
-    newMsg = {}
-    newMsg['type'] = 'PIREP'
-
-    # Just make up a random name
-    newMsg['unique_name'] = util.randomname(12)
-    
-    newMsg['report_type'] = parsed.group(5)
-    newMsg['station'] = parsed.group(4)
-    newMsg['contents'] = contents
+    # Just make up a random name for unique_name.
+    # The report fields are added after these.
+    newMsg = {'type': 'PIREP', \
+              'unique_name': util.randomname(12), \
+              'report_type': parsed.group(5), \
+              'station': parsed.group(4), \
+              'contents': contents}
     
     # Go through the actual report portion and divide into fields.
     # Note that fields are things like /OV, but that a slash is can also
-    # be used in the contents of a field, so we must first replace field
-    # names like /OV with ~OV and then split those.
-    fieldsDefined = parsed.group(6)
-
-    for idx, fieldName in enumerate(PIREP_FIELDS_FROM):
-        if fieldName in fieldsDefined:
-            fieldsDefined = fieldsDefined.replace(fieldName, PIREP_FIELDS_TO[idx])
-
-    fields = fieldsDefined.split('~')
+    # be used in the contents of a field, so we only split on the
+    # known field names. The result is a list of any text before the
+    # first field, followed by each field name and its contents.
+    fields = PIREP_FIELDS_RE.split(parsed.group(6))
     
-    for x in fields:
-        x = x.strip()
-
-        # The first '~' always generates a '' field. Just skip it.
-        if x == '':
-            continue
-
+    # Text before the first field is normally empty. If not, treat
+    # its first 2 characters as a field name.
+    x = fields[0].strip()
+    if x != '':
         # Field names are always 2 characters, so string needs at least this
         # length
         if len(x) < 2:
             raise ex.PirepFieldTooSmallException('PIREP field length too short')
 
-        fieldName = x[0:2].lower()
-        fieldContents = x[2:].strip()
+        newMsg[x[0:2].lower()] = x[2:].strip()
 
-        newMsg[fieldName] = fieldContents
+    for (fieldName, fieldContents) in zip(fields[1::2], fields[2::2]):
+        newMsg[fieldName.lower()] = fieldContents.strip()
 
     reportTime = util.dayHourMinToIso8601(rYear, rMonth, rDay, parsed.group(3))    
     newMsg['report_time'] = reportTime
 
     # Basing the expiration off the report time is the better option here,
     # but the standard mandates at least 75 minutes from last reception
-    if cfg.PIREP_USE_REPORT_TIME_TO_EXPIRE:
-        newMsg['expiration_time'] = util.addMinutesToIso8601(reportTime, \
-                                                         cfg.PIREP_EXPIRATION_MINUTES)
-    else:
-        newMsg['expiration_time'] = util.addMinutesToIso8601(rcvdTime, \
+    expireFrom = reportTime if cfg.PIREP_USE_REPORT_TIME_TO_EXPIRE else rcvdTime
+    newMsg['expiration_time'] = util.addMinutesToIso8601(expireFrom, \
                                                          cfg.PIREP_EXPIRATION_MINUTES)
     return newMsg
 
@@ -215,23 +217,20 @@ def metar(contents, rYear, rMonth, rDay):
         dict: Dictionary with completed METAR message.
     """
     # Returned message
-    newMsg = {}
-
     parsed = METAR_RE.match(contents)
     location = parsed.group(2)
 
-    newMsg['type'] = 'METAR'
-    newMsg['unique_name'] = location
-    newMsg['location'] = location
-    newMsg['contents'] = contents
-
     observationTime = util.dayHourMinToIso8601(rYear, rMonth, rDay, parsed.group(3))
-    newMsg['observation_time'] = observationTime
 
     # Add time to observation time based-on configuration parameter to
     # create expiration time.
-    newMsg['expiration_time'] = util.addMinutesToIso8601(observationTime, \
-                                                         cfg.METAR_EXPIRATION_MINUTES)
+    newMsg = {'type': 'METAR', \
+              'unique_name': location, \
+              'location': location, \
+              'contents': contents, \
+              'observation_time': observationTime, \
+              'expiration_time': util.addMinutesToIso8601(observationTime, \
+                                                          cfg.METAR_EXPIRATION_MINUTES)}
     return newMsg
 
 def taf(contents, rYear, rMonth, rDay):
@@ -253,47 +252,33 @@ def taf(contents, rYear, rMonth, rDay):
     Raises:
         RegexDidNotMatchException: If the TAF did not match any template.
     """
-    newMsg = {}
-
-    # Handles normal TAF except for Naval Air Stations.
     parsed = TAF_RE.match(contents)
 
     if not parsed:
-        # Naval Air Stations don't have normal issued_time Zulu time
-        parsed = TAF_RE_NO_Z_TIME.match(contents)
-
-        # if everything fails
-        if not parsed:
-            raise ex.RegexDidNotMatchException('TAF did not match any template.')
+        raise ex.RegexDidNotMatchException('TAF did not match any template.')
 
-        issuedTimeGroup = 3
-        validPeriodBeginGroup = 3
-        validPeriodEndGroup = 4
+    (location, issuedTime, validPeriodBegin, validPeriodEnd) = \
+        parsed.group(2, 3, 4, 5)
 
-    else:
-        issuedTimeGroup = 3
-        validPeriodBeginGroup = 4
-        validPeriodEndGroup = 5
-        
-    location = parsed.group(2)
-
-    newMsg['type'] = 'TAF'
-    newMsg['unique_name'] = location
-    newMsg['location'] = location
-    newMsg['issued_time'] = util.dayHourMinToIso8601(rYear, rMonth, rDay,\
-        parsed.group(issuedTimeGroup))
-    newMsg['valid_period_begin_time'] = util.dayHourMinToIso8601(rYear, rMonth, rDay,\
-        parsed.group(validPeriodBeginGroup))
+    # Naval Air Stations don't have normal issued_time Zulu time.
+    # Use the valid period begin time instead.
+    if issuedTime is None:
+        issuedTime = validPeriodBegin
 
     validPeriodEnd = util.dayHourMinToIso8601(rYear, rMonth, rDay,\
-        parsed.group(validPeriodEndGroup))
-
-    newMsg['valid_period_end_time'] = validPeriodEnd
-
-    newMsg['contents'] = contents
+        validPeriodEnd)
 
     # Expiration time is when the valid period is over.
-    newMsg['expiration_time'] = validPeriodEnd
+    newMsg = {'type': 'TAF', \
+              'unique_name': location, \
+              'location': location, \
+              'issued_time': util.dayHourMinToIso8601(rYear, rMonth, rDay,\
+                  issuedTime), \
+              'valid_period_begin_time': util.dayHourMinToIso8601(rYear, rMonth, rDay,\
+                  validPeriodBegin), \
+              'valid_period_end_time': validPeriodEnd, \
+              'contents': contents, \
+              'expiration_time': validPeriodEnd}
     
     return newMsg
 
@@ -336,16 +321,14 @@ def winds(contents, rYear, rMonth, rDay, hour, minute):
     Raises:
         IllegalWindProductException: If we get a forecast we aren't expecting.
     """
-    newMsg = {}
-
     parsed = WINDS_RE.match(contents)
     location = parsed.group(2)
     validTime = parsed.group(3)
 
     # Contents have useless header line not needed after decoding
     # location and time. Remove it.
-    contentsSplit = contents.split('\n')
-    contents = contentsSplit[1].rstrip()
+    # Only the second line is needed, so don't split the rest.
+    contents = contents.split('\n', 2)[1].rstrip()
 
     # To figure out what type of forecast we are, we need to know
     # the product available time and the valid time. The product
@@ -356,35 +339,19 @@ def winds(contents, rYear, rMonth, rDay, hour, minute):
 
     # First, figure out the product available time from
     # the APDU
-    if (hour >= 1) and (hour < 3):     # 0200
-        paIdx = 0
-    elif (hour >= 7) and (hour < 9):   # 0800
-        paIdx = 1
-    elif (hour >= 13) and (hour < 15): # 1400
-        paIdx = 2
-    elif (hour >= 19) and (hour < 21): # 2000
-        paIdx = 3
-    else:
+    paIdx = WIND_PA_IDX.get(hour)
+    if paIdx is None:
         raise ex.IllegalWindProductException("Hour of {} isn't valid.".format(hour))
 
     # Now figure out the valid time from the message.
-    vTimeInt = int(validTime[2:])
-
-    if vTimeInt == 600:
-        vtIdx = 0
-    elif vTimeInt == 1200:
-        vtIdx = 1
-    elif vTimeInt == 1800:
-        vtIdx = 2
-    elif vTimeInt == 0:
-        vtIdx = 3
-    else:
+    vtIdx = WIND_VT_IDX.get(int(validTime[2:]))
+    if vtIdx is None:
         raise ex.IllegalWindProductException("Valid time of {} isn't legal.".format(validTime))
 
     # Now try to match the prodAvail time with valid time to get
     # the forecast type.
     # Will return 6, 12, or 24 depending on type of forecast. -1 for illegal cases.
-    product = WIND_MATRIX[paIdx][vtIdx]
+    product = WIND_MATRIX[(paIdx * 4) + vtIdx]
 
     if product == -1:
         raise ex.IllegalWindProductException("Illegal Product Matrix values: {} {}.".format(paIdx, vtIdx))
@@ -394,52 +361,45 @@ def winds(contents, rYear, rMonth, rDay, hour, minute):
     # dealing with, we can compute the other times.
     validTimeIsoStr = util.dayHourMinToIso8601(rYear, rMonth, rDay, validTime) 
 
-    if product == 6:
-        prodAvailIsoStr = util.addHoursToIso8601(validTimeIsoStr, -4)
-        modelRunIsoStr = util.addHoursToIso8601(validTimeIsoStr, -6)
-        forUseBegin = util.addHoursToIso8601(validTimeIsoStr, -4)
-        forUseEnd = util.addHoursToIso8601(validTimeIsoStr, 3)
-        prodName = 'WINDS_06_HR'
-    elif product == 12:
-        prodAvailIsoStr = util.addHoursToIso8601(validTimeIsoStr, -10)
-        modelRunIsoStr = util.addHoursToIso8601(validTimeIsoStr, -12)
-        forUseBegin = util.addHoursToIso8601(validTimeIsoStr, -3)
-        forUseEnd = util.addHoursToIso8601(validTimeIsoStr, 6)
-        prodName = 'WINDS_12_HR'
-    elif product == 24:
-        prodAvailIsoStr = util.addHoursToIso8601(validTimeIsoStr, -22)
-        modelRunIsoStr = util.addHoursToIso8601(validTimeIsoStr, -24)
-        forUseBegin = util.addHoursToIso8601(validTimeIsoStr, -6)
-        forUseEnd = util.addHoursToIso8601(validTimeIsoStr, 6)
-        prodName = 'WINDS_24_HR'
-    else:
+    productInfo = WIND_PRODUCTS.get(product)
+    if productInfo is None:
         raise ex.IllegalWindProductException("Illegal Product value: {}".format(product))        
 
+    (prodName, hoursFromValidTime) = productInfo
+
+    # Parse the valid time once (without the 'Z') and add each
+    # offset to it, rather than parsing it again for each time.
+    validTimeObj = datetime.datetime.fromisoformat(validTimeIsoStr[:-1])
+
+    (prodAvailIsoStr, modelRunIsoStr, forUseBegin, forUseEnd) = \
+        ['{}Z'.format((validTimeObj + datetime.timedelta(hours = x)).isoformat()) \
+         for x in hoursFromValidTime]
+
     # Just to be accurate, we calculated the product available time from valid time.
     # Now go back and put the actual time from APDU back in. It's only
     # off a small amount and won't affect the day of the month (because
     # products aren't made available near 0000Z).
-    prodAvailIsoStr = prodAvailIsoStr[0:11] + \
-                      '{:02d}:{:02d}'.format(hour, minute) + \
-                      prodAvailIsoStr[16:]
-
-    newMsg['type'] = prodName
-    newMsg['unique_name'] = location
-    newMsg['location'] = location
-
-    newMsg['issued_time'] = prodAvailIsoStr
-    newMsg['valid_time'] = validTimeIsoStr
-    newMsg['for_use_from_time'] = forUseBegin
-    newMsg['for_use_to_time'] = forUseEnd
-    newMsg['contents'] = contents
-    newMsg['model_run_time'] = modelRunIsoStr
+    prodAvailIsoStr = '{}{:02d}:{:02d}{}'.format(prodAvailIsoStr[0:11], \
+                                                 hour, minute, \
+                                                 prodAvailIsoStr[16:])
 
     if prodName == 'WINDS_06_HR':
         # Standard states you have to keep the last 6 hour wind around 
         # until the next one comes in. So we just add a day to the
         # 'forUseEnd' time. Other WIND forecast times don't have this requirement.
-        newMsg['expiration_time'] = util.addDaysToIso8601(forUseEnd, 1)
+        expirationTime = util.addDaysToIso8601(forUseEnd, 1)
     else:
-        newMsg['expiration_time'] = forUseEnd    
+        expirationTime = forUseEnd    
+
+    newMsg = {'type': prodName, \
+              'unique_name': location, \
+              'location': location, \
+              'issued_time': prodAvailIsoStr, \
+              'valid_time': validTimeIsoStr, \
+              'for_use_from_time': forUseBegin, \
+              'for_use_to_time': forUseEnd, \
+              'contents': contents, \
+              'model_run_time': modelRunIsoStr, \
+              'expiration_time': expirationTime}
 
     return newMsg
@@ -9,37 +9,34 @@ The following messages are created from here:
 The NOTAM type will have a subtype of 'D', 'FDC', 'TMOA', or 'TRA'.
 """
 
-import sys, os, json, time, re, pprint
+import sys, os, json, time, re, pprint, functools
 
 import fisb.level2.level2Config as cfg
 import fisb.level2.utilities as util
 import fisb.level2.level2Exceptions as ex
 
-# RegEx for NOTAM time string (group(1) -> first date, group(2) -> second date)
-NOTAM_TIMES_RE = re.compile(r"(\d\d[01]\d[0-3]\d[0-2]\d[0-5]\d)-(\d\d[01]\d[0-3]\d[0-2]\d[0-5]\d|PERM)")
+# Product ids of NOTAMs that are part of a CRL (NOTAM-TRA and NOTAM-TMOA).
+CRL_PRODUCT_IDS = frozenset((16, 17))
 
-# RegEx for a NOTAM-TFR to get the notam number
-NOTAM_TFR_RE = re.compile(r"^NOTAM-TFR ([0-9]/[0-9]{4}) ")
+# NOTAM subtypes that can have airspace and altitude fields.
+SUA_SUBTYPES = frozenset(('TMOA', 'TRA', 'D-SUA'))
 
-# RegEx for a NOTAM-D or NOTAM-FDC for components
-NOTAM_RE = re.compile(r"NOTAM-(D|FDC|TMOA|TRA) ([^ ]+) ([^ ]+) !([^ ]+) ([^ ]+) ([^ ]+) ([^ ]+)")
+# RegEx for a NOTAM-TFR to get the notam number
+NOTAM_TFR_RE = re.compile(r"^NOTAM-TFR ([0-9]/[0-9]{4}) ", re.ASCII)
 
-# RegEx for a NOTAM-D or NOTAM-FDC for the NOTAM contents (starting with !)
-NOTAM_CONTENTS_RE = re.compile(r"NOTAM-(D|FDC|TMOA|TRA) ([^ ]+) ([^ ]+) (.+)", re.S)
+# RegEx for a NOTAM-D or NOTAM-FDC. group(1) -> subtype, group(4) -> NOTAM
+# contents (starting with !), and from the contents: group(5) -> accountable
+# location, group(6) -> NOTAM number, group(7) -> affected location,
+# group(8) -> keyword.
+# Subtypes are listed most common first.
+NOTAM_RE = re.compile(r"^NOTAM-(D|FDC|TRA|TMOA) ([^ ]+) ([^ ]+) (!([^ ]+) ([^ ]+) ([^ ]+) ([^ ]+).*)", re.S | re.ASCII)
 
 # RegEx for basic SUA NOTAM-D parsing
 #NOTAM_SUA_RE = re.compile(r".*AIRSPACE (.+) ACT (.+) \d{10}-\d{10}")
-NOTAM_SUA_RE = re.compile(r".*AIRSPACE (LGT OUT/NIGHT VISION GOGGLE TRAINING )?(.+) ACT (.+) \d{10}-\d{10}")
+NOTAM_SUA_RE = re.compile(r".*AIRSPACE (LGT OUT/NIGHT VISION GOGGLE TRAINING )?(.+) ACT (.+) \d{10}-\d{10}", re.ASCII)
 
 # RegEx for parsing SUA NOTAM-D altitude string
-NOTAM_SUA_ALT_RE = re.compile(r"((FL\d+)|SFC|(\d+FT( AGL)?))(-| UP TO BUT NOT INCLUDING )((FL\d+)|(\d+FT( AGL)?))")
-
-# RegEx for FIS-B unavailable products (group(1) -> 6 digit date,
-# group(2) -> list of centers, group(3) -> message text)
-FISB_RE = re.compile(r"FIS-B ([0-3]\d[0-2]\d[0-5]\d)Z ([^ ]+) (.+)")
-
-# Parses the specific FIS-B product that is unavailable.
-FISB_PROD_RE = re.compile(r"^(.+) PRODUCT")
+NOTAM_SUA_ALT_RE = re.compile(r"((FL\d+)|SFC|(\d+FT( AGL)?))(-| UP TO BUT NOT INCLUDING )((FL\d+)|(\d+FT( AGL)?))", re.ASCII)
 
 def msg8_16_17(contentsText, contentsGraphics, productId, \
              rYear, rMonth, rDay, \
@@ -71,8 +68,6 @@ def msg8_16_17(contentsText, contentsGraphics, productId, \
     Raises:
         TooManyRecordsException: For NOTAM messages that have more than 1 record.
     """
-    newMsg = None
-    
     # Should never see a record count other than 1 in a NOTAM text section
     if contentsText['record_count'] != 1:
         raise ex.TooManyRecordsException('NOTAM has more than 1 record')
@@ -116,7 +111,7 @@ def msg8_16_17(contentsText, contentsGraphics, productId, \
     # that are present and not empty, we will add it as part of the report id.
     # We need to do all this before we check for cancelled NOTAMs.
 
-    if productId in [16, 17]:
+    if productId in CRL_PRODUCT_IDS:
         reportId = str(month) + '-' + str(records0['report_number'])
     else:
         reportId = str(records0['report_year']) + '-' + str(records0['report_number'])
@@ -133,13 +128,10 @@ def msg8_16_17(contentsText, contentsGraphics, productId, \
 
     # If this is a cancellation, create and send it.
     if records0['report_status'] == 0:
-        newMsg = {}
-        newMsg['type'] = 'CANCEL_NOTAM'
-        newMsg['unique_name'] = reportId
-        newMsg['expiration_time'] = util.addMinutesToIso8601(rcvdTime, \
-            cfg.CANCEL_EXPIRATION_TIME)
-
-        return newMsg
+        return {'type': 'CANCEL_NOTAM', \
+                'unique_name': reportId, \
+                'expiration_time': util.addMinutesToIso8601(rcvdTime, \
+                                                            cfg.CANCEL_EXPIRATION_TIME)}
 
     text = records0['text']
 
@@ -150,16 +142,13 @@ def msg8_16_17(contentsText, contentsGraphics, productId, \
     # slot doesn't matter, just the fact that it exists. We also send 
     # it with a default expiration time of cfg.TWGO_DEFAULT_EXPIRATION_TIME.
     if len(text) == 0:
-        newMsg = {}
-        newMsg['type'] = 'NOTAM'
-        newMsg['subtype'] = 'TFR'
-        newMsg['unique_name'] = reportId
-        newMsg['station'] = station
-        newMsg['renew-only'] = '1'
-        newMsg['expiration_time'] = util.addMinutesToIso8601(rcvdTime, \
-            cfg.TWGO_DEFAULT_EXPIRATION_TIME)
-
-        return newMsg
+        return {'type': 'NOTAM', \
+                'subtype': 'TFR', \
+                'unique_name': reportId, \
+                'station': station, \
+                'renew-only': '1', \
+                'expiration_time': util.addMinutesToIso8601(rcvdTime, \
+                                                            cfg.TWGO_DEFAULT_EXPIRATION_TIME)}
     
     # FAA text is full of trailing whitespace. Get rid of it.
     text = util.cleanFAAText(text)
@@ -206,35 +195,39 @@ def fisbProductUnavailable(rYear, rMonth, rDay, reportId, text, rcvdTime):
     # Make sure it isn't an old format used only for test messages
     if text.startswith('FIS-B SERVICE OUTAGE'):
         text = 'FIS-B ' + text[21:]
-    m = FISB_RE.match(text)
-    if m is None:
+    # Layout is 'FIS-B ddhhmmZ <centers> <contents>'. Parsed by hand
+    # since the dispatcher already checked the 'FIS-B' prefix.
+    # 'contents' ends at the first newline, if any.
+    spaceIdx = text.find(' ', 14)
+    contents = text[spaceIdx + 1:].split('\n', 1)[0]
+    dayHourMin = text[6:12]
+
+    if (text[5:6] != ' ') or (not util.isDayHourMin(dayHourMin)) or \
+            (text[12:14] != 'Z ') or (spaceIdx <= 14) or (len(contents) == 0):
         raise ex.RegexDidNotMatchException("fisbRE did not match: '{}'".format(text))
 
-    issuedTime = util.dayHourMinToIso8601(rYear, rMonth, rDay, m.group(1))
-    centers = m.group(2).split(',')
-    contents = m.group(3)
+    issuedTime = util.dayHourMinToIso8601(rYear, rMonth, rDay, dayHourMin)
+    centers = text[14:spaceIdx].split(',')
 
-    # Try to parse the product that is unavailable
-    m = FISB_PROD_RE.match(contents)
-    if m is None:
+    # The product that is unavailable is everything before the last
+    # ' PRODUCT'.
+    productIdx = contents.rfind(' PRODUCT')
+    if productIdx <= 0:
         raise ex.RegexDidNotMatchException("fisbRE did not match: '{}'".format(text))
 
-    product = m.group(1)
+    product = contents[:productIdx]
 
     # Make up an expiration time. Standard states these should expire 20
     # minutes past the time of last reception. These are not stored in level3.
     expireAt = util.addMinutesToIso8601(rcvdTime, cfg.FISB_EXPIRATION_MINUTES)
 
-    newMsg = {}
-    newMsg['type'] = 'FIS_B_UNAVAILABLE'
-    newMsg['unique_name'] = reportId
-    newMsg['issued_time'] = issuedTime
-    newMsg['contents'] = contents
-    newMsg['product'] = product
-    newMsg['centers'] = centers
-    newMsg['expiration_time'] = expireAt
-
-    return newMsg
+    return {'type': 'FIS_B_UNAVAILABLE', \
+            'unique_name': reportId, \
+            'issued_time': issuedTime, \
+            'contents': contents, \
+            'product': product, \
+            'centers': centers, \
+            'expiration_time': expireAt}
 
 def createGeometryList(contentsGraphics, referenceIso, productId):
     """Create a geometry list from the current ``contents_graphics`` dictionary.
@@ -252,6 +245,29 @@ def createGeometryList(contentsGraphics, referenceIso, productId):
 
     return geometryList
 
+def addGeometry(newMsg, contentsGraphics, startActIso, rcvdTime, productId):
+    """Add a ``geometry`` key to a NOTAM message if it has a graphics part.
+
+    Args:
+        newMsg (dict): Message to add the ``geometry`` key to.
+        contentsGraphics (dict): ``content_graphics`` dictionary, or ``None``
+            if there is no graphics part.
+        startActIso (str): NOTAM ``start_of_activity_time``, or ``None``
+            if the NOTAM has none.
+        rcvdTime (str): Message received time in ISO format.
+        productId (int): Product ID.
+    """
+    if contentsGraphics is None:
+        return
+
+    # Don't always have a start of activity time (use received time as ISO ref)
+    referenceIso = rcvdTime
+    if startActIso is not None:
+        referenceIso = startActIso
+
+    newMsg['geometry'] = createGeometryList(contentsGraphics, \
+        referenceIso, productId)
+
 def tfrNotam(rYear, rMonth, rDay, reportId, text, contentsGraphics, \
         productId, station, rcvdTime):
     """Decode and a return a NOTAM_TFR message.
@@ -284,8 +300,6 @@ def tfrNotam(rYear, rMonth, rDay, reportId, text, contentsGraphics, \
     Raises:
         RegexDidNotMatchException: If NOTAM-TFR could not match template.
     """
-    newMsg = {}
-
     # Parse off the NOTAM number (used for display)
     nTfr = NOTAM_TFR_RE.match(text)
 
@@ -293,23 +307,19 @@ def tfrNotam(rYear, rMonth, rDay, reportId, text, contentsGraphics, \
     if nTfr is None:
         raise ex.RegexDidNotMatchException("NOTAM-TFR could not match: '{}'".format(text))
 
-    newMsg['type'] = 'NOTAM'
-    newMsg['subtype'] = 'TFR'
-    newMsg['unique_name'] = reportId
-    newMsg['contents'] = text
-    newMsg['station'] = station
-    newMsg['number'] = nTfr.group(1)
-    newMsg = insertNotamDates(rYear, rMonth, rDay, text, newMsg)
+    newMsg = {'type': 'NOTAM', \
+              'subtype': 'TFR', \
+              'unique_name': reportId, \
+              'contents': text, \
+              'station': station, \
+              'number': nTfr.group(1)}
 
-    # Don't always have a start of activity time (use received time as ISO ref)
-    soat = rcvdTime
-    if 'start_of_activity_time' in newMsg:
-        soat = newMsg['start_of_activity_time']
+    (startActIso, endValidIso) = notamDates(rYear, text)
+    if startActIso is not None:
+        newMsg['start_of_activity_time'] = startActIso
+        newMsg['end_of_validity_time'] = endValidIso
 
-    # see if we have geometry
-    if contentsGraphics is not None:
-        newMsg['geometry'] = createGeometryList(contentsGraphics, \
-            soat, productId)
+    addGeometry(newMsg, contentsGraphics, startActIso, rcvdTime, productId)
 
     newMsg['expiration_time'] = util.twgoExpirationTime(newMsg, rcvdTime)
     return newMsg
@@ -435,44 +445,34 @@ def notam(rYear, rMonth, rDay, location, reportId, text, contentsGraphics, \
     Raises:
         RegexDidNotMatchException: If NOTAM could not match template.
     """
-    newMsg = {}
-
-    # Parse off the NOTAM components
+    # Parse off the NOTAM components and the NOTAM text (!...)
     nComp = NOTAM_RE.match(text)
 
-    # Parse the NOTAM text (!...)
-    nText = NOTAM_CONTENTS_RE.match(text)
-
     # Make sure we got what the connect decoding
-    if (nComp is None) or (nText is None):
+    if nComp is None:
         raise ex.RegexDidNotMatchException("NOTAM could not match: '{}'".format(text))
 
-    # Get the rest of the components
-    notamSubtype = nComp.group(1)
-    accountableLocation = nComp.group(4)
-    affectedLocation = nComp.group(6)
-    keyword = nComp.group(7)
-    notamNumber = nComp.group(5)
-
-    # Get the contents (must start with '!')
-    notamContents = nText.group(4)
-
-    if notamContents[0] != '!':
-        raise ex.RegexDidNotMatchException("NOTAM format problem: '{}'".format(text))
+    # Get the rest of the components. The contents always start
+    # with '!' since the RegEx requires it.
+    (notamSubtype, notamContents, accountableLocation, notamNumber, \
+     affectedLocation, keyword) = nComp.group(1, 4, 5, 6, 7, 8)
 
     # Create the message
-    newMsg['type'] = 'NOTAM'
-    newMsg['subtype'] = notamSubtype
-
-    newMsg['unique_name'] = reportId
-    newMsg['location'] = location
-    newMsg['contents'] = notamContents
-    newMsg['accountable'] = accountableLocation
-    newMsg['affected'] = affectedLocation
-    newMsg['keyword'] = keyword
-    newMsg['number'] = notamNumber
-    newMsg['station'] = station
-    newMsg = insertNotamDates(rYear, rMonth, rDay, text, newMsg)
+    newMsg = {'type': 'NOTAM', \
+              'subtype': notamSubtype, \
+              'unique_name': reportId, \
+              'location': location, \
+              'contents': notamContents, \
+              'accountable': accountableLocation, \
+              'affected': affectedLocation, \
+              'keyword': keyword, \
+              'number': notamNumber, \
+              'station': station}
+
+    (startActIso, endValidIso) = notamDates(rYear, text)
+    if startActIso is not None:
+        newMsg['start_of_activity_time'] = startActIso
+        newMsg['end_of_validity_time'] = endValidIso
 
     # Change subtype if this is an SUA message (can be SUAC, SUAE, SUAW).
     if (notamSubtype == 'D') and accountableLocation.startswith('SUA'):
@@ -480,7 +480,7 @@ def notam(rYear, rMonth, rDay, location, reportId, text, contentsGraphics, \
     
     # TMOA, TRA, and D-SUA can have airspace and altitude_text fields.
     # D-SUA can also parse top level altitudes field.
-    if newMsg['subtype'] in ['TMOA', 'TRA', 'D-SUA']:
+    if newMsg['subtype'] in SUA_SUBTYPES:
 
         # Parse the NOTAM-D SUA text
         nSua = NOTAM_SUA_RE.match(notamContents)
@@ -494,65 +494,62 @@ def notam(rYear, rMonth, rDay, location, reportId, text, contentsGraphics, \
                 if altitudes is not None:
                     newMsg['altitudes'] = altitudes
             
-    # Don't always have a start of activity time (use received time as ISO ref)
-    soat = rcvdTime
-    if 'start_of_activity_time' in newMsg:
-        soat = newMsg['start_of_activity_time']
-    
-    # see if we have geometry
-    if contentsGraphics is not None:
-        newMsg['geometry'] = createGeometryList(contentsGraphics, \
-            soat, productId)
+    addGeometry(newMsg, contentsGraphics, startActIso, rcvdTime, productId)
 
     # Also supply the NOTAM expiration time unless it is a PERM time.
     notamExpireTime = None
-    if 'end_of_validity_time' in newMsg:
-        eovt = newMsg['end_of_validity_time']
-        if eovt != cfg.NOTAM_PERM_TIME:
-            notamExpireTime = eovt
+    if (endValidIso is not None) and (endValidIso != cfg.NOTAM_PERM_TIME):
+        notamExpireTime = endValidIso
 
     newMsg['expiration_time'] = util.twgoExpirationTime(newMsg, rcvdTime, notamExpireTime)
     return newMsg
 
-def insertNotamDates(rYear, rMonth, rDay, text, dict):
-    """Inserts 'start of activity' and 'end of validity' dates in message.
+@functools.lru_cache(maxsize=1024)
+def notamDates(rYear, text):
+    """Find the 'start of activity' and 'end of validity' dates in a NOTAM.
 
-    Places the ``start_of_activity_time``, and ``end_of_validity_time``
-    keys in the dictionary for all NOTAM types. 
+    Results are cached. NOTAMs are retransmitted every broadcast cycle
+    with the same text.
 
     An ``end_of_validity_time`` of PERM will use a configurable date which should
     be way in the future.
 
     Args:
         rYear (int): Message received year.
-        rMonth (int): Message received month.
-        rDay (int): Message received day.
         text (str): Text of the entire NOTAM.
-        dict (dict): Dictionary to insert messages into.
 
     Returns:
-        dict: Dictionary with updated message fields.
-    """
-    startActIso = None
-    endValidIso = None
-
-    m = NOTAM_TIMES_RE.search(text)
-    if m is not None:
-        startAct = m.group(1)
-        endValid = m.group(2)
-
-        # See if permanent, if so use configured fixed date way in the future.
-        if (endValid == 'PERM'):
-            endValidIso = cfg.NOTAM_PERM_TIME
-        else:
-            endValidIso = util.notamTimeToIso8601(rYear, endValid)
-
-        startActIso = util.notamTimeToIso8601(rYear, startAct)
-        
-    if startActIso is not None:
-        dict['start_of_activity_time'] = startActIso
+        tuple: Tuple:
+
+        1. (str) ``start_of_activity_time`` as an ISO-8601 string.
+        2. (str) ``end_of_validity_time`` as an ISO-8601 string.
 
-    if endValidIso is not None:
-        dict['end_of_validity_time'] = endValidIso
+        Both are ``None`` if the NOTAM has no dates.
+    """
+    # Look for the first 'yymmddhhmm-yymmddhhmm' or 'yymmddhhmm-PERM'.
+    # Only dashes with a valid time in front of them are checked.
+    endValid = None
+    dashIdx = text.find('-', 10)
+    while dashIdx != -1:
+        startAct = text[dashIdx - 10:dashIdx]
+        if util.isNotamTime(startAct):
+            endValid = text[dashIdx + 1:dashIdx + 11]
+            if util.isNotamTime(endValid):
+                break
+            if endValid.startswith('PERM'):
+                endValid = 'PERM'
+                break
+            endValid = None
+
+        dashIdx = text.find('-', dashIdx + 1)
+
+    if endValid is None:
+        return (None, None)
+
+    # See if permanent, if so use configured fixed date way in the future.
+    if (endValid == 'PERM'):
+        endValidIso = cfg.NOTAM_PERM_TIME
+    else:
+        endValidIso = util.notamTimeToIso8601(rYear, endValid)
 
-    return dict
+    return (util.notamTimeToIso8601(rYear, startAct), endValidIso)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+"""Test data for the msg8_16_17 module in level2.
+"""
+
+import sys, os
+
+import pytest
+
+import fisb.level2.level2Config as cfg
+import fisb.level2.level2Exceptions as ex
+from fisb.level2.msg8_16_17 import fisbProductUnavailable
+from fisb.level2.msg8_16_17 import notamDates
+
+def productUnavailable(text):
+    """Call ``fisbProductUnavailable`` with a fixed received time."""
+    return fisbProductUnavailable(2020, 10, 30, '20-10001', text, \
+                                  '2020-10-30T12:30:00Z')
+
+def test_fisbProductUnavailable():
+    msg = productUnavailable('FIS-B 301220Z ZID,ZOB NEXRAD CONUS PRODUCT UNAVAILABLE')
+    assert(msg['issued_time']) == '2020-10-30T12:20:00Z'
+    assert(msg['centers']) == ['ZID', 'ZOB']
+    assert(msg['contents']) == 'NEXRAD CONUS PRODUCT UNAVAILABLE'
+    assert(msg['product']) == 'NEXRAD CONUS'
+
+    # Old test message format.
+    msg = productUnavailable('FIS-B SERVICE OUTAGE 301220Z ZID METAR PRODUCT UNAVAILABLE')
+    assert(msg['centers']) == ['ZID']
+    assert(msg['product']) == 'METAR'
+
+    # Product is everything before the last ' PRODUCT'.
+    msg = productUnavailable('FIS-B 301220Z ZID PIREP PRODUCT PRODUCT UNAVAILABLE')
+    assert(msg['product']) == 'PIREP PRODUCT'
+
+    # Contents end at the first newline.
+    msg = productUnavailable('FIS-B 301220Z ZID TAF PRODUCT UNAVAILABLE\nMORE')
+    assert(msg['contents']) == 'TAF PRODUCT UNAVAILABLE'
+    assert(msg['product']) == 'TAF'
+
+def test_fisbProductUnavailableBad():
+    badTexts = ['FIS-B', \
+                'FIS-B 301220Z', \
+                'FIS-B 301220Z ZID', \
+                'FIS-B 301220Z ZID ', \
+                'FIS-B 301220Z ZID \nTAF PRODUCT', \
+                'FIS-B 301220 ZID TAF PRODUCT', \
+                'FIS-B 3012201Z ZID TAF PRODUCT', \
+                'FIS-B 401220Z ZID TAF PRODUCT', \
+                'FIS-B 303220Z ZID TAF PRODUCT', \
+                'FIS-B 301260Z ZID TAF PRODUCT', \
+                'FIS-B  301220Z ZID TAF PRODUCT', \
+                'FIS-B 301220Z  ZID TAF PRODUCT', \
+                'FIS-B301220Z ZID TAF PRODUCT', \
+                'FIS-B 301220Z ZID TAF UNAVAILABLE', \
+                'FIS-B 301220Z ZID PRODUCT UNAVAILABLE', \
+                'FIS-B 301220Z ZID  PRODUCT UNAVAILABLE']
+
+    for text in badTexts:
+        with pytest.raises(ex.RegexDidNotMatchException):
+            productUnavailable(text)
+
+def test_notamDates():
+    # No dates
+    assert(notamDates(2020, '!DAY 10/371 DAY RWY 18/36 CLSD')) == (None, None)
+    assert(notamDates(2020, '!DAY 10/371 DAY RWY 18/36 CLSD 2010301200')) == (None, None)
+
+    # Date pair
+    assert(notamDates(2020, '!DAY 10/371 DAY RWY 18/36 CLSD 2010301200-2010301900')) == \
+        ('2020-10-30T12:00:00Z', '2020-10-30T19:00:00Z')
+
+    # Permanent
+    assert(notamDates(2020, '!ORD 10/001 ORD OBST TOWER LGT U/S 2010301200-PERM')) == \
+        ('2020-10-30T12:00:00Z', cfg.NOTAM_PERM_TIME)
+
+    # Estimated end time
+    assert(notamDates(2020, '!FDC 0/4261 BAK IAP COLUMBUS MUNI.\nS-LOC 23 MDA 1060/HAT 404.\n2010191244-2210191244EST')) == \
+        ('2020-10-19T12:44:00Z', '2022-10-19T12:44:00Z')
+
+    # Hyphenated text that isn't a date pair
+    assert(notamDates(2020, '!SUAC 10/251 ZOB AIRSPACE R-5502 ACT 100FT-FL230')) == (None, None)
+    assert(notamDates(2020, '!SUAC 10/251 ZOB AIRSPACE R5502B ACT SFC-FL230 2010301200-2010302000')) == \
+        ('2020-10-30T12:00:00Z', '2020-10-30T20:00:00Z')
+    assert(notamDates(2020, '!X 1/1 X Y 2010301299-2010302000 2010301200-2010301900')) == \
+        ('2020-10-30T12:00:00Z', '2020-10-30T19:00:00Z')
+
+    # First date pair is used
+    assert(notamDates(2020, '!X 1/1 X Y 2010301200-2010302000 2011011100-2011011200')) == \
+        ('2020-10-30T12:00:00Z', '2020-10-30T20:00:00Z')
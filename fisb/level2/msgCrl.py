@@ -40,10 +40,10 @@ import fisb.level2.level2Exceptions as ex
 #: Messages stuck in the system. Also see
 #: :mod:`fisb.level2.msg11_12_15` which ignores
 #: the text of these messages.
-BAD_MESSAGES_CRL12 = ['20-7489', '20-7676']
+BAD_MESSAGES_CRL12 = frozenset(('20-7489', '20-7676'))
 
-PRODUCT_TYPE = ['','','','','','','','','NOTAM/TFR','','', \
-        'AIRMET','SIGMET','','G-AIRMET','CWA','NOTAM/TRA','NOTAM/TMOA']
+PRODUCT_TYPE = ('','','','','','','','','NOTAM/TFR','','', \
+        'AIRMET','SIGMET','','G-AIRMET','CWA','NOTAM/TRA','NOTAM/TMOA')
 
 def msgCrl(rcvdTime, frame, station):
     """Process CRL (Current Report List) messages.
@@ -27,8 +27,8 @@ import fisb.level2.level2Exceptions as ex
 
 # Address qualifier list. They get appended if they are not 0 (99.9999%) are.
 # The only non-zero one seen is 1 (Self-Assigned address).
-ADDR_QUALIFIER_TYPES = ['', '/1', '/2', '/3', '/4', \
-                        '/5', '/6', '/7']
+ADDR_QUALIFIER_TYPES = ('', '/1', '/2', '/3', '/4', \
+                        '/5', '/6', '/7')
 
 def msgServiceStatus(rcvdTime, frame, station):
     """Process Service Status messages.
@@ -2,7 +2,7 @@
 """
 
 import sys, os, datetime, copy
-import math, random
+import math, random, select, functools
 
 import fisb.level2.level2Exceptions as ex
 import fisb.level2.level2Config as cfg
@@ -15,6 +15,9 @@ ONE_DAY = datetime.timedelta(1)
 # of repetitions is 32 ('W')
 REPETITION_MAP = '0123456789ABCDEFGHIJKLMNOPQRSTUVW'
 
+# ASCII digits. Used for character by character checks of FAA times.
+DIGITS = '0123456789'
+
 def cleanFAAText(origText):
     """Take FAA text message and trim whitespace from end.
 
@@ -69,6 +72,7 @@ def iso8601ToSeconds(isoString, allowMicroSeconds = False):
         secs = round(secs)
     return secs
 
+@functools.lru_cache(maxsize=1024)
 def componentsToIso8601Referenced(referenceIso, month, day, hour, minute):
     """Return time components as an ISO-8601 formatted string referenced to ISO date.
 
@@ -78,6 +82,9 @@ def componentsToIso8601Referenced(referenceIso, month, day, hour, minute):
     close to when the year changes. The year portion of the returned ISO date
     will either be the same as the reference or +/- 1 year.
 
+    Results are cached. TWGO messages are retransmitted many times
+    with the same times, so most calls are repeats.
+
     Args:
         month (int): Month of year (1-12)
         day (int): Day of month
@@ -217,9 +224,13 @@ def addDaysToIso8601(isoStr, days):
     utcObj = datetime.datetime.utcfromtimestamp(secs)
     return '{}Z'.format(utcObj.isoformat())
 
+@functools.lru_cache(maxsize=4096)
 def notamTimeToIso8601(currentYear, faaStr):
     """Converts NOTAM ``yymmddhhmm`` string to Iso8601
 
+    Results are cached. NOTAMs and SUAs are retransmitted many times
+    with the same activity times.
+
     Args:
         currentYear (int): Current time year
         faaStr (str): FAA NOTAM time in the form ``YYMMDDHHMM``
@@ -313,6 +324,44 @@ def iso8601FromApduHourMins(currentYear, currentMonth, \
                                winner.hour, \
                                winner.minute)
 
+def isDayHourMin(faaStr):
+    """Return ``True`` if ``faaStr`` is an FAA 6 digit ``ddhhmm`` time.
+
+    Same test as the regular expression ``[0-3][0-9][0-2][0-9][0-5][0-9]``
+    without the cost of running a regular expression.
+
+    Args:
+        faaStr (str): String to check.
+
+    Returns:
+        bool: ``True`` if ``faaStr`` is 6 characters with the digit
+        ranges above, else ``False``.
+    """
+    return (len(faaStr) == 6) and \
+        (faaStr[0] in '0123') and (faaStr[1] in DIGITS) and \
+        (faaStr[2] in '012') and (faaStr[3] in DIGITS) and \
+        (faaStr[4] in '012345') and (faaStr[5] in DIGITS)
+
+def isNotamTime(faaStr):
+    """Return ``True`` if ``faaStr`` is a 10 digit NOTAM ``yymmddhhmm`` time.
+
+    Same test as the regular expression
+    ``[0-9][0-9][01][0-9][0-3][0-9][0-2][0-9][0-5][0-9]``
+    without the cost of running a regular expression.
+
+    Args:
+        faaStr (str): String to check.
+
+    Returns:
+        bool: ``True`` if ``faaStr`` is 10 characters with the digit
+        ranges above, else ``False``.
+    """
+    return (len(faaStr) == 10) and \
+        (faaStr[0] in DIGITS) and (faaStr[1] in DIGITS) and \
+        (faaStr[2] in '01') and (faaStr[3] in DIGITS) and \
+        isDayHourMin(faaStr[4:])
+
+@functools.lru_cache(maxsize=4096)
 def dayHourMinToIso8601(currentYear, currentMonth, currentDay, faaStr):
     """Convert FAA standard 6 digit time string to ISO time
 
@@ -324,6 +373,9 @@ def dayHourMinToIso8601(currentYear, currentMonth, currentDay, faaStr):
     Assumes that the date/time is within 10 days +/- of the 
     current time.
 
+    Results are cached. Many METARs, TAFs, and winds in a broadcast
+    cycle share the same times.
+
     Args:
         currentYear (int): Current year (4 digit).
         currentMonth (int): Current month (1-12).
@@ -613,8 +665,8 @@ def getAltitudeAndGeoType(overlayGeometryOptions):
     return (altType, geoType)
 
 # Object element values
-OBJECT_ELEMENT_LIST = ['TFR', 'TURB', 'LLWS', 'SFC', 'ICING', \
-                     'FRZLVL', 'IFR', 'MTN']
+OBJECT_ELEMENT_LIST = ('TFR', 'TURB', 'LLWS', 'SFC', 'ICING', \
+                     'FRZLVL', 'IFR', 'MTN')
 
 def populateCommonItems(record, referenceIso):
     """Populate message items common to all geometry types.
@@ -1394,8 +1446,6 @@ def twgoExpirationTime(msg, rcvdTime, notamExpirationTime=None):
 
 CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
 
-CHARS_LEN_MINUS_1 = len(CHARS) - 1
-
 def randomname(length, postfix = ''):
     """Create a random name of the specified length, add a postfix string
     if desired.
@@ -1412,8 +1462,21 @@ def randomname(length, postfix = ''):
     Returns:
         str: Random string with any ``postfix`` added to it.
     """
-    name = ''
-    for _ in range(0, length):
-        name += CHARS[random.randint(0, CHARS_LEN_MINUS_1)]
-    
-    return name + postfix
+    return ''.join(random.choices(CHARS, k = length)) + postfix
+
+def flushIfInputIdle(inFile, outFile):
+    """Flush ``outFile`` unless more input is already waiting on ``inFile``.
+
+    Levels are chained together with pipes. Flushing after every
+    message costs a system call per message, which dominates when
+    processing stored messages in bulk. Not flushing at all holds
+    real time messages back. So we only flush when there is
+    no more input ready to read (i.e. we are about to wait).
+
+    Args:
+        inFile (file): Input file object (usually ``sys.stdin``).
+        outFile (file): Output file object (usually ``sys.stdout``).
+    """
+    readable, _, _ = select.select([inFile], [], [], 0)
+    if not readable:
+        outFile.flush()
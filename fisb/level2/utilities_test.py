@@ -9,6 +9,8 @@ from fisb.level2.utilities import singleDigitYear
 from fisb.level2.utilities import doubleDigitYear
 from fisb.level2.utilities import dayHourMinToIso8601
 from fisb.level2.utilities import cleanFAAText
+from fisb.level2.utilities import isDayHourMin
+from fisb.level2.utilities import isNotamTime
 
 def test_cleanFAAText():
     xx = cleanFAAText("line1\nline2\n")
@@ -76,6 +78,31 @@ def test_dayHourMinToIso8601():
     assert(dayHourMinToIso8601(2020, 2, 28, '011234')) == '2020-03-01T12:34:00'
     assert(dayHourMinToIso8601(2020, 2, 28, '291234')) == '2020-02-29T12:34:00'
 
+def test_isDayHourMin():
+    assert(isDayHourMin('062057')) == True
+    assert(isDayHourMin('312359')) == True
+    assert(isDayHourMin('000000')) == True
+    assert(isDayHourMin('412057')) == False
+    assert(isDayHourMin('063057')) == False
+    assert(isDayHourMin('062067')) == False
+    assert(isDayHourMin('06205')) == False
+    assert(isDayHourMin('0620571')) == False
+    assert(isDayHourMin('06 057')) == False
+    assert(isDayHourMin('')) == False
+
+def test_isNotamTime():
+    assert(isNotamTime('2010301200')) == True
+    assert(isNotamTime('9912312359')) == True
+    assert(isNotamTime('0000000000')) == True
+    assert(isNotamTime('2020301200')) == False
+    assert(isNotamTime('2010401200')) == False
+    assert(isNotamTime('2010303200')) == False
+    assert(isNotamTime('2010301260')) == False
+    assert(isNotamTime('201030120')) == False
+    assert(isNotamTime('20103012001')) == False
+    assert(isNotamTime('PERM')) == False
+    assert(isNotamTime('')) == False
+
 def test_singleDigitYear():
     assert(singleDigitYear(2015, '0')) == 2010
     assert(singleDigitYear(2015, '1')) == 2011
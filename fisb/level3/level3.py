@@ -64,6 +64,10 @@ import fisb.level3.utilities as util
 
 from fisb.level3.Deduplicator import Deduplicator
 
+# Only import orjson if asked to use it
+if cfg.USE_ORJSON:
+    import orjson
+
 # If True will print to standard output, otherwise not.
 # Initially taken from config, but can be over-ridden by
 # '--todir'
@@ -128,7 +132,11 @@ def level3(msg, ppIndent):
     try:
             
         # See if we need to bypass level3 for this message.
-        jmsg = json.loads(msg)            
+        if cfg.USE_ORJSON:
+            jmsg = orjson.loads(msg)
+        else:
+            jmsg = json.loads(msg)
+
         if bypassLevel3(jmsg) or deduplicator.okToSendMsg(msg):
             if print_to_stdout:
                 # Message is a string. It we want it pretty printed
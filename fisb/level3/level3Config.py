@@ -3,6 +3,12 @@
 #: Filename used to record frames that error out during decoding.
 ERROR_FILENAME = 'LEVEL3.ERR'
 
+#: If ``True``, use the ``orjson`` package (``pip3 install orjson``)
+#: to parse incoming messages. Messages are passed along (and
+#: deduplicated) as the original string, so output is the same
+#: either way.
+USE_ORJSON = False
+
 #: Expire messages that have not been seen in this many minutes
 #: The longest interval time between sending is 15 minutes for some
 #: image products, so time should be greater than this.